@@ -1,6 +1,22 @@
+from uuid import UUID
+
 from django.contrib import admin
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import OuterRef, Q, Subquery
+
+from .models import FilmWork, FilmWorkSearch, Genre, GenreFilmWork, Person, PersonFilmWork, PersonRole
+from .pagination import KeysetPaginationMixin
+
 
-from .models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+def aggregated_names(queryset, field):
+    return Subquery(
+        queryset
+        .filter(film_work=OuterRef('pk'))
+        .values('film_work')
+        .annotate(names=StringAgg(field, delimiter=', ', ordering=field))
+        .values('names')
+    )
 
 
 @admin.register(Genre)
@@ -20,7 +36,8 @@ class PersonFilmWorkInline(admin.TabularInline):
 
 
 @admin.register(FilmWork)
-class FilmWorkAdmin(admin.ModelAdmin):
+class FilmWorkAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    keyset_fields = ('title', 'id')
     inlines = (GenreFilmWorkInline, PersonFilmWorkInline)
     list_display = (
         'title',
@@ -33,28 +50,46 @@ class FilmWorkAdmin(admin.ModelAdmin):
     )
     list_filter = ('type',)
     search_fields = ('title', 'description', 'id')
-    list_prefetch_related = ('genres', 'person_set', 'person_film')
 
     def get_queryset(self, request):
         queryset = (
             super()
             .get_queryset(request)
-            .prefetch_related(*self.list_prefetch_related)
+            .annotate(
+                genre_names=aggregated_names(GenreFilmWork.objects, 'genre__name'),
+                actor_names=aggregated_names(
+                    PersonFilmWork.objects.filter(role=PersonRole.ACTOR), 'person__full_name',
+                ),
+                director_names=aggregated_names(
+                    PersonFilmWork.objects.filter(role=PersonRole.DIRECTOR), 'person__full_name',
+                ),
+            )
         )
         return queryset
 
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        try:
+            return queryset.filter(pk=UUID(search_term)), False
+        except ValueError:
+            pass
+        matches = FilmWorkSearch.objects.filter(
+            Q(document=SearchQuery(search_term, config='simple', search_type='websearch'))
+            | Q(title__icontains=search_term)
+            | Q(persons__icontains=search_term)
+        )
+        return queryset.filter(pk__in=matches.values('film_work')), False
+
     def get_genres(self, obj):
-        return ', '.join([genre.name for genre in obj.genres.all()])
+        return obj.genre_names or ''
 
     def get_actors(self, obj):
-        person_idx = [film.person_id for film in obj.person_film.all() if film.role == 'actor']
-        actors = [person.full_name for person in obj.person_set.all() if person.id in person_idx]
-        return ', '.join(actor for actor in actors)
+        return obj.actor_names or ''
 
     def get_directors(self, obj):
-        person_idx = [film.person_id for film in obj.person_film.all() if film.role == 'director']
-        director = [person.full_name for person in obj.person_set.all() if person.id in person_idx]
-        return ', '.join(actor for actor in director)
+        return obj.director_names or ''
 
     get_genres.short_description = 'Жанры'
     get_actors.short_description = 'Актеры'
@@ -62,6 +97,7 @@ class FilmWorkAdmin(admin.ModelAdmin):
 
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    keyset_fields = ('full_name', 'id')
     list_display = ('full_name',)
     search_fields = ('full_name', 'id')
@@ -0,0 +1,104 @@
+# Generated by Django 3.2 on 2026-10-18 12:59
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CREATE_FILM_WORK_SEARCH = '''
+CREATE TABLE IF NOT EXISTS content.film_work_search (
+    id uuid PRIMARY KEY REFERENCES content.film_work (id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    genres TEXT,
+    persons TEXT,
+    document tsvector NOT NULL,
+    refreshed timestamp with time zone
+);
+
+CREATE INDEX IF NOT EXISTS film_work_search_document ON content.film_work_search USING gin (document);
+CREATE INDEX IF NOT EXISTS film_work_search_title_trgm ON content.film_work_search USING gin (upper(title) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS film_work_search_persons_trgm ON content.film_work_search USING gin (upper(persons) gin_trgm_ops);
+
+CREATE OR REPLACE FUNCTION content.refresh_film_work_search(since timestamp with time zone DEFAULT NULL)
+RETURNS integer LANGUAGE sql AS $$
+    WITH changed AS (
+        SELECT id FROM content.film_work WHERE since IS NULL OR modified >= since
+        UNION
+        SELECT film_work_id FROM content.genre_film_work WHERE created >= since
+        UNION
+        SELECT film_work_id FROM content.person_film_work WHERE created >= since
+        UNION
+        SELECT link.film_work_id
+        FROM content.genre_film_work AS link
+        JOIN content.genre ON genre.id = link.genre_id
+        WHERE genre.modified >= since
+        UNION
+        SELECT link.film_work_id
+        FROM content.person_film_work AS link
+        JOIN content.person ON person.id = link.person_id
+        WHERE person.modified >= since
+    ), refreshed AS (
+        INSERT INTO content.film_work_search (id, title, genres, persons, document, refreshed)
+        SELECT film_work.id, film_work.title, genres.names, persons.names,
+               setweight(to_tsvector('simple', film_work.title), 'A')
+               || setweight(to_tsvector('simple', coalesce(persons.names, '')), 'B')
+               || setweight(to_tsvector('simple', coalesce(genres.names, '')), 'B')
+               || setweight(to_tsvector('simple', coalesce(film_work.description, '')), 'C'),
+               NOW()
+        FROM content.film_work
+        JOIN changed ON changed.id = film_work.id
+        LEFT JOIN LATERAL (
+            SELECT string_agg(genre.name, ', ' ORDER BY genre.name) AS names
+            FROM content.genre_film_work AS link
+            JOIN content.genre ON genre.id = link.genre_id
+            WHERE link.film_work_id = film_work.id
+        ) AS genres ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT string_agg(DISTINCT person.full_name, ', ') AS names
+            FROM content.person_film_work AS link
+            JOIN content.person ON person.id = link.person_id
+            WHERE link.film_work_id = film_work.id
+        ) AS persons ON TRUE
+        ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, genres = EXCLUDED.genres,
+                                       persons = EXCLUDED.persons, document = EXCLUDED.document,
+                                       refreshed = EXCLUDED.refreshed
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM refreshed;
+$$;
+
+SELECT content.refresh_film_work_search();
+'''
+
+DROP_FILM_WORK_SEARCH = '''
+DROP FUNCTION IF EXISTS content.refresh_film_work_search(timestamp with time zone);
+DROP TABLE IF EXISTS content.film_work_search;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_alter_verbose_name_to_tables'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(CREATE_FILM_WORK_SEARCH, DROP_FILM_WORK_SEARCH),
+        migrations.CreateModel(
+            name='FilmWorkSearch',
+            fields=[
+                ('film_work', models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='movies.filmwork')),
+                ('title', models.TextField(verbose_name='title')),
+                ('genres', models.TextField(null=True, verbose_name='genres')),
+                ('persons', models.TextField(null=True, verbose_name='persons')),
+                ('document', django.contrib.postgres.search.SearchVectorField()),
+                ('refreshed', models.DateTimeField(null=True)),
+            ],
+            options={
+                'db_table': '"content"."film_work_search"',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+CREATE_UNIQUE_LINK_INDEXES = '''
+CREATE UNIQUE INDEX IF NOT EXISTS film_work_genre_idx ON content.genre_film_work (film_work_id, genre_id);
+CREATE UNIQUE INDEX IF NOT EXISTS person_film_work_role_idx ON content.person_film_work (person_id, film_work_id, role);
+'''
+
+DROP_UNIQUE_LINK_INDEXES = '''
+DROP INDEX IF EXISTS content.film_work_genre_idx;
+DROP INDEX IF EXISTS content.person_film_work_role_idx;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_film_work_search'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_UNIQUE_LINK_INDEXES, DROP_UNIQUE_LINK_INDEXES),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='genrefilmwork',
+                    constraint=models.UniqueConstraint(fields=('film_work', 'genre'), name='film_work_genre_idx'),
+                ),
+                migrations.AddConstraint(
+                    model_name='personfilmwork',
+                    constraint=models.UniqueConstraint(
+                        fields=('person', 'film_work', 'role'), name='person_film_work_role_idx',
+                    ),
+                ),
+            ],
+        ),
+    ]
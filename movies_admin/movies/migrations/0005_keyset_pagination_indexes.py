@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+CREATE_KEYSET_INDEXES = '''
+CREATE INDEX IF NOT EXISTS film_work_title_id_idx ON content.film_work (title, id);
+CREATE INDEX IF NOT EXISTS person_full_name_id_idx ON content.person (full_name, id);
+DROP INDEX IF EXISTS content.film_work_title, content.person_full_name;
+'''
+
+DROP_KEYSET_INDEXES = '''
+CREATE INDEX IF NOT EXISTS film_work_title ON content.film_work (title);
+CREATE INDEX IF NOT EXISTS person_full_name ON content.person (full_name);
+DROP INDEX IF EXISTS content.film_work_title_id_idx;
+DROP INDEX IF EXISTS content.person_full_name_id_idx;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_unique_link_natural_keys'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_KEYSET_INDEXES, DROP_KEYSET_INDEXES),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='filmwork',
+                    index=models.Index(fields=['title', 'id'], name='film_work_title_id_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='person',
+                    index=models.Index(fields=['full_name', 'id'], name='person_full_name_id_idx'),
+                ),
+            ],
+        ),
+    ]
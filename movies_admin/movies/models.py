@@ -1,5 +1,6 @@
 from uuid import uuid4
 
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -64,6 +65,9 @@ class FilmWork(UUIDMixin, TimeStampedMixin):
 
     class Meta:
         db_table = '"content"."film_work"'
+        indexes = [
+            models.Index(fields=['title', 'id'], name='film_work_title_id_idx'),
+        ]
         verbose_name = _('film')
         verbose_name_plural = _('films')
 
@@ -75,8 +79,8 @@ class GenreFilmWork(UUIDMixin):
 
     class Meta:
         db_table = '"content"."genre_film_work"'
-        indexes = [
-            models.Index(fields=['film_work', 'genre'], name='film_work_genre_idx'),
+        constraints = [
+            models.UniqueConstraint(fields=['film_work', 'genre'], name='film_work_genre_idx'),
         ]
         verbose_name = _('genre')
         verbose_name_plural = _('genres')
@@ -91,6 +95,9 @@ class Person(UUIDMixin, TimeStampedMixin):
 
     class Meta:
         db_table = '"content"."person"'
+        indexes = [
+            models.Index(fields=['full_name', 'id'], name='person_full_name_id_idx'),
+        ]
         verbose_name = _('person')
         verbose_name_plural = _('persons')
 
@@ -118,6 +125,25 @@ class PersonFilmWork(UUIDMixin):
 
     class Meta:
         db_table = '"content"."person_film_work"'
-        indexes = [
-            models.Index(fields=['person', 'film_work', 'role'], name='person_film_work_role_idx'),
+        constraints = [
+            models.UniqueConstraint(fields=['person', 'film_work', 'role'], name='person_film_work_role_idx'),
         ]
+
+
+class FilmWorkSearch(models.Model):
+    film_work = models.OneToOneField(
+        FilmWork,
+        primary_key=True,
+        db_column='id',
+        related_name='search',
+        on_delete=models.DO_NOTHING,
+    )
+    title = models.TextField(_('title'))
+    genres = models.TextField(_('genres'), null=True)
+    persons = models.TextField(_('persons'), null=True)
+    document = SearchVectorField()
+    refreshed = models.DateTimeField(null=True)
+
+    class Meta:
+        managed = False
+        db_table = '"content"."film_work_search"'
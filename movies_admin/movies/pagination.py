@@ -0,0 +1,133 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger, Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 10000
+CURSOR_VAR = 'after'
+
+ESTIMATED_COUNT_QUERY = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+
+
+def estimated_count(model) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(ESTIMATED_COUNT_QUERY, [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def encode_cursor(values: list) -> str:
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(urlsafe_b64decode(cursor.encode()))
+    except (Base64Error, ValueError) as err:
+        raise InvalidPage('Некорректный курсор страницы') from err
+
+
+def seek_condition(fields: tuple, values: list) -> Q:
+    condition = Q()
+    for position, field in enumerate(fields):
+        equal = {previous: value for previous, value in zip(fields[:position], values)}
+        condition |= Q(**equal, **{f'{field}__gt': values[position]})
+    if len(fields) > 1:
+        return Q(**{f'{fields[0]}__gte': values[0]}) & condition
+    return condition
+
+
+def keyset_page_number(number) -> int:
+    try:
+        number = int(number)
+    except (TypeError, ValueError) as err:
+        raise PageNotAnInteger('Номер страницы должен быть целым числом') from err
+    if number < 1:
+        raise EmptyPage('Номер страницы меньше 1')
+    return number
+
+
+class EstimatedCountPaginator(Paginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_count(self.object_list.model)
+            if estimate >= ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+        return super().count
+
+
+class KeysetPaginator(EstimatedCountPaginator):
+    def __init__(self, object_list, per_page, keyset_fields: tuple, after: str = None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.keyset_fields = keyset_fields
+        self.after = after
+        self.next_cursor = None
+
+    def page(self, number):
+        if not self.keyset_fields or (self.after is None and number != 1):
+            return super().page(number)
+        number = keyset_page_number(number)
+        object_list = self.object_list
+        if self.after is not None:
+            values = decode_cursor(self.after)
+            if len(values) != len(self.keyset_fields):
+                raise InvalidPage('Некорректный курсор страницы')
+            object_list = object_list.filter(seek_condition(self.keyset_fields, values))
+        object_list = list(object_list[:self.per_page])
+        if len(object_list) == self.per_page:
+            last = object_list[-1]
+            self.next_cursor = encode_cursor([str(getattr(last, field)) for field in self.keyset_fields])
+        return self._get_page(object_list, number, self)
+
+
+class KeysetChangeList(ChangeList):
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        new_params = new_params or {}
+        if CURSOR_VAR not in new_params:
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        super().get_results(request)
+        next_cursor = getattr(self.paginator, 'next_cursor', None)
+        self.next_page_url = next_cursor and self.get_query_string({
+            PAGE_VAR: self.page_num + 1,
+            CURSOR_VAR: next_cursor,
+        })
+
+
+class KeysetPaginationMixin:
+    keyset_fields = ('id',)
+    paginator = KeysetPaginator
+    show_full_result_count = False
+
+    def get_ordering(self, request):
+        return self.keyset_fields
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        sorted_by_user = ORDER_VAR in request.GET
+        return self.paginator(
+            queryset,
+            per_page,
+            () if sorted_by_user else self.keyset_fields,
+            None if sorted_by_user else request.GET.get(CURSOR_VAR),
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
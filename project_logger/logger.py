@@ -1,14 +1,50 @@
+import atexit
+import json
 import logging.config
 from datetime import datetime
-from os import path
+from logging.handlers import QueueHandler, QueueListener
+from os import environ, path
+from queue import SimpleQueue
+
+STRUCTURED_FIELDS = ('table', 'batch', 'rows', 'duration')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'function': record.funcName,
+            'message': record.getMessage(),
+        }
+        entry.update({field: getattr(record, field) for field in STRUCTURED_FIELDS if hasattr(record, field)})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 log_file_path = path.join(path.dirname(path.abspath(__file__)), 'logger.conf')
 logging.config.fileConfig(log_file_path)
 log = logging.getLogger('MainLogger')
+log.setLevel(environ.get('LOG_LEVEL', 'DEBUG').upper())
 
 file_handler = logging.FileHandler('{:%Y-%m-%d}.log'.format(datetime.now()))
-formatter = logging.Formatter('%(asctime)s | %(levelname)-8s | %(funcName)-40s | %(message)s')
+if environ.get('LOG_FORMAT') == 'json':
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter('%(asctime)s | %(levelname)-8s | %(funcName)-40s | %(message)s')
 file_handler.setFormatter(formatter)
 
-log.addHandler(file_handler)
+handlers = [*log.handlers, file_handler]
+for handler in handlers:
+    log.removeHandler(handler)
+log_queue = SimpleQueue()
+log.addHandler(DeferredQueueHandler(log_queue))
+listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
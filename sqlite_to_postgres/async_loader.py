@@ -0,0 +1,163 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from time import perf_counter
+
+from context_managers import open_postgresql_db, open_sqlite_db
+from loaders import Batch, SQLiteExtractor, as_tuples
+from metrics import metrics
+from options import LoadOptions
+from project_logger import log
+from psycopg2.extensions import connection as postgres_connection
+from references import reference_guard
+from schema_mapping import MOVIE_MAPPING, TableMapping, introspect_mapping, source_date
+from sql_queries import FOREIGN_KEYS_QUERY
+from staging import ArrowExtractor
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+DEFAULT_IN_FLIGHT = 4
+
+
+def asyncpg_connect_kwargs(dsl: dict) -> dict:
+    return {
+        'database': dsl.get('dbname'),
+        'user': dsl.get('user'),
+        'password': dsl.get('password'),
+        'host': dsl.get('host'),
+        'port': int(dsl.get('port') or 5432),
+        'server_settings': {'search_path': 'content'},
+    }
+
+
+def asyncpg_rows(mapping: TableMapping, rows: list) -> list:
+    dates = [position for position, parameter_type in enumerate(mapping.parameter_types) if parameter_type == 'date']
+    if not dates:
+        return rows
+    converted = []
+    for row in rows:
+        row = list(row)
+        for position in dates:
+            row[position] = source_date(row[position])
+        converted.append(tuple(row))
+    return converted
+
+
+class AsyncLoader:
+    def __init__(self, sqlite_db: str, dsl: dict, options: LoadOptions = None):
+        if asyncpg is None:
+            raise ImportError('Для асинхронной загрузки нужен пакет asyncpg')
+        self.sqlite_db = sqlite_db
+        self.dsl = dsl
+        self.options = options or LoadOptions()
+        self.in_flight = self.options.queue_depth or DEFAULT_IN_FLIGHT
+
+    async def run(self) -> None:
+        with open_postgresql_db(self.dsl) as pg_conn:
+            self.mapping = self._introspect(pg_conn) if self.options.introspect else MOVIE_MAPPING
+            self.insert_query = {
+                table: table_mapping.insert_query(numbered=True).as_string(pg_conn)
+                for table, table_mapping in self.mapping.items()
+            }
+        with reference_guard(self.options.quarantine_file, self.mapping) as guard:
+            self.guard = guard
+            if guard:
+                with open_postgresql_db(self.dsl) as pg_conn:
+                    guard.seed(pg_conn)
+            await self._run_graph()
+
+    def _introspect(self, pg_conn: postgres_connection) -> dict:
+        with open_sqlite_db(self.sqlite_db, read_only=True) as sqlite_conn:
+            return introspect_mapping(sqlite_conn, pg_conn)
+
+    async def _run_graph(self) -> None:
+        pool_size = self.options.workers * self.in_flight
+        async with asyncpg.create_pool(min_size=1, max_size=pool_size, **asyncpg_connect_kwargs(self.dsl)) as pool:
+            graph = await self._dependency_graph(pool)
+            if self.guard:
+                graph = self.guard.reference_order(graph)
+            loaded = {table: asyncio.Event() for table in graph}
+            tables = asyncio.Semaphore(self.options.workers)
+
+            async def load_when_ready(table: str) -> None:
+                for referenced_table in graph[table]:
+                    await loaded[referenced_table].wait()
+                async with tables:
+                    await self._load_table(pool, table)
+                loaded[table].set()
+
+            await asyncio.gather(*(load_when_ready(table) for table in graph))
+
+    async def _dependency_graph(self, pool) -> dict[str, set[str]]:
+        graph = {table: set() for table in self.mapping}
+        for table, referenced_table in await pool.fetch(FOREIGN_KEYS_QUERY):
+            if table in graph and referenced_table in graph and referenced_table != table:
+                graph[table].add(referenced_table)
+        return graph
+
+    async def _load_table(self, pool, table: str) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.in_flight)
+        writes, errors = set(), []
+        written = 0
+        sqlite_db = nullcontext() if self.options.staging_dir else open_sqlite_db(self.sqlite_db, read_only=True)
+        with sqlite_db as sqlite_conn, ThreadPoolExecutor(1) as reader:
+            if self.options.staging_dir:
+                data = ArrowExtractor(self.options.staging_dir).extract_table(table)
+            else:
+                data = SQLiteExtractor(sqlite_conn, self.options.validate, mapping=self.mapping).extract_table(table)
+            if self.guard:
+                data = self.guard.check(data, table)
+            while (batch := await loop.run_in_executor(reader, next, data, None)) is not None:
+                await slots.acquire()
+                if errors:
+                    raise errors[0]
+                write = asyncio.create_task(self._write(pool, table, batch, slots, errors))
+                writes.add(write)
+                write.add_done_callback(writes.discard)
+                written += len(batch.rows)
+            await asyncio.gather(*writes)
+        if errors:
+            raise errors[0]
+        log.info(f'Postgres (async): Сохранено {written} записей в таблицу "{table}"')
+
+    async def _write(self, pool, table: str, batch: Batch, slots: asyncio.Semaphore, errors: list) -> None:
+        try:
+            async with pool.acquire() as connection:
+                started = perf_counter()
+                rows = asyncpg_rows(self.mapping[table], as_tuples(batch.rows))
+                written = await self._write_rows(connection, table, rows)
+                metrics.record(table, 'write', written, perf_counter() - started)
+        except Exception as err:
+            metrics.record_error(table, 'write')
+            log.critical(f'Во время асинхронной вставки в таблицу "{table}" произошла ошибка: {err}')
+            errors.append(err)
+        finally:
+            slots.release()
+
+    async def _write_rows(self, connection, table: str, rows: list) -> int:
+        if not self.guard:
+            await connection.executemany(self.insert_query[table], rows)
+            return len(rows)
+        try:
+            async with connection.transaction():
+                await connection.executemany(self.insert_query[table], rows)
+        except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as err:
+            metrics.record_retry(table, 'write')
+            if len(rows) == 1:
+                self.guard.quarantine.add(table, rows[0], str(err).strip())
+                return 0
+            middle = len(rows) // 2
+            return (
+                await self._write_rows(connection, table, rows[:middle])
+                + await self._write_rows(connection, table, rows[middle:])
+            )
+        self.guard.on_written(table, rows)
+        return len(rows)
+
+
+def load_from_sqlite_async(sqlite_db: str, dsl: dict, options: LoadOptions = None) -> None:
+    asyncio.run(AsyncLoader(sqlite_db, dsl, options).run())
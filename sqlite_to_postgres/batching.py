@@ -0,0 +1,103 @@
+from sys import getsizeof
+
+from project_logger import log
+
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 10_000
+MAX_COMMIT_INTERVAL = 50
+MAX_STEP = 2
+SMOOTHING = 0.3
+SIZE_SAMPLE = 20
+PROBE_BATCH_SIZE = 50
+
+
+def estimate_bytes(rows: list) -> int:
+    if not rows:
+        return 0
+    sample = rows[:SIZE_SAMPLE]
+    sample_bytes = sum(len(str(value)) for row in sample for value in row if value is not None)
+    return sample_bytes * len(rows) // len(sample)
+
+
+def estimate_memory(rows: list) -> int:
+    if not rows:
+        return 0
+    sample = rows[:SIZE_SAMPLE]
+    sample_bytes = sum(_object_memory(row) for row in sample)
+    return getsizeof(rows) + sample_bytes * len(rows) // len(sample)
+
+
+def _object_memory(row) -> int:
+    values = row if isinstance(row, tuple) else [getattr(row, name) for name in row.__slots__]
+    return getsizeof(row) + sum(getsizeof(value) for value in values)
+
+
+class MemoryBudget:
+    def __init__(self, table: str, limit_bytes: int):
+        self.table = table
+        self.limit_bytes = limit_bytes
+        self.bytes_per_row = None
+
+    def cap(self, batch_size: int) -> int:
+        if self.bytes_per_row is None:
+            return min(batch_size, PROBE_BATCH_SIZE)
+        return max(min(batch_size, int(self.limit_bytes // self.bytes_per_row)), 1)
+
+    def observe(self, rows: list) -> None:
+        if not rows:
+            return
+        bytes_per_row = estimate_memory(rows) / len(rows)
+        if self.bytes_per_row is None or bytes_per_row > self.bytes_per_row:
+            self.bytes_per_row = bytes_per_row
+            log.info(
+                f'Память: Таблица "{self.table}": {bytes_per_row:.0f} байт на запись, '
+                f'не больше {self.cap(MAX_BATCH_SIZE)} записей в пачке при лимите {self.limit_bytes} байт'
+            )
+
+
+class AdaptiveBatchController:
+    def __init__(
+        self,
+        table: str,
+        target_seconds: float = 0.5,
+        byte_budget: int = None,
+        batch_size: int = 500,
+    ):
+        self.table = table
+        self.target_seconds = target_seconds
+        self.byte_budget = byte_budget
+        self.batch_size = batch_size
+        self.commit_interval = 1
+        self.rows_per_second = None
+        self.bytes_per_row = None
+
+    @property
+    def page_size(self) -> int:
+        return self.batch_size
+
+    def record_commit(self, rows: int, seconds: float, size: int) -> None:
+        if not rows:
+            return
+        self.rows_per_second = self._smooth(self.rows_per_second, rows / max(seconds, 1e-6))
+        self.bytes_per_row = self._smooth(self.bytes_per_row, max(size / rows, 1))
+        current_rows = self.batch_size * self.commit_interval
+        target_rows = self.rows_per_second * self.target_seconds
+        if self.byte_budget:
+            target_rows = min(target_rows, self.byte_budget / self.bytes_per_row)
+        target_rows = min(max(target_rows, current_rows / MAX_STEP), current_rows * MAX_STEP)
+        target_rows = int(min(max(target_rows, MIN_BATCH_SIZE), MAX_BATCH_SIZE * MAX_COMMIT_INTERVAL))
+        batch_size = min(target_rows, MAX_BATCH_SIZE)
+        commit_interval = max(round(target_rows / batch_size), 1)
+        if (batch_size, commit_interval) != (self.batch_size, self.commit_interval):
+            self.batch_size, self.commit_interval = batch_size, commit_interval
+            log.info(
+                f'Пачки: Таблица "{self.table}": пачка {batch_size} записей, фиксация каждые {commit_interval} '
+                f'пачек (фиксация {rows} записей заняла {seconds:.2f} с, {self.rows_per_second:.0f} записей/с, '
+                f'{self.bytes_per_row:.0f} байт/запись)'
+            )
+
+    @staticmethod
+    def _smooth(previous: float, value: float) -> float:
+        if previous is None:
+            return value
+        return SMOOTHING * value + (1 - SMOOTHING) * previous
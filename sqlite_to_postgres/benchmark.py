@@ -0,0 +1,155 @@
+import json
+import logging
+import resource
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from os import environ, path
+from time import perf_counter
+
+from context_managers import open_postgresql_db, open_sqlite_db
+from dotenv import load_dotenv
+from fixtures import SCALES, generate_sqlite_fixture
+from load_data import load_from_sqlite
+from loaders import LOAD_MODES, SQLiteExtractor, as_tuples
+from metrics import STAGES, metrics
+from movies_dataclasses import MOVIE_DATACLASS
+from options import LoadOptions
+from project_logger import log
+from psycopg2.extensions import parse_dsn
+from sql_queries import TRUNCATE_CONTENT_QUERY
+
+VARIANTS = [(mode, validate) for mode in LOAD_MODES for validate in (False, True)]
+
+
+def measure_extraction(sqlite_db: str, validate: bool) -> dict[str, float]:
+    rows_per_second = {}
+    with open_sqlite_db(sqlite_db, read_only=True) as sqlite_conn:
+        sqlite_extractor = SQLiteExtractor(sqlite_conn, validate)
+        for table in MOVIE_DATACLASS.keys():
+            rows = 0
+            started = perf_counter()
+            for batch in sqlite_extractor.extract_table(table):
+                rows += len(as_tuples(batch.rows))
+            rows_per_second[table] = rows / max(perf_counter() - started, 1e-9)
+    return rows_per_second
+
+
+def measure_load(sqlite_db: str, dsl: dict, mode: str, validate: bool) -> dict:
+    log.setLevel(logging.WARNING)
+    with open_sqlite_db(sqlite_db, read_only=True) as sqlite_conn, open_postgresql_db(dsl) as pg_conn:
+        with pg_conn.cursor() as cursor:
+            cursor.execute(TRUNCATE_CONTENT_QUERY)
+        pg_conn.commit()
+        metrics.reset()
+        started = perf_counter()
+        load_from_sqlite(sqlite_conn, pg_conn, LoadOptions(mode=mode, validate=validate))
+        total_seconds = perf_counter() - started
+    tables = {}
+    for table in MOVIE_DATACLASS.keys():
+        rows = metrics.rows[table, 'extract']
+        seconds = sum(metrics.durations[table, stage].sum for stage in STAGES if (table, stage) in metrics.durations)
+        tables[table] = {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / max(seconds, 1e-9)}
+    total_rows = sum(table['rows'] for table in tables.values())
+    return {
+        'mode': mode,
+        'validate': validate,
+        'rows': total_rows,
+        'seconds': total_seconds,
+        'rows_per_second': total_rows / max(total_seconds, 1e-9),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'tables': tables,
+    }
+
+
+def same_database(dsn: str, configured: dict) -> bool:
+    target = parse_dsn(dsn)
+    return (
+        target.get('dbname') == configured['dbname']
+        and _host(target.get('host')) == _host(configured['host'])
+        and str(target.get('port', 5432)) == str(configured['port'])
+    )
+
+
+def _host(host: str) -> str:
+    return 'localhost' if host in (None, '', '127.0.0.1', '::1') else host
+
+
+def run_isolated(function, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(function, *args).result()
+
+
+def compare_results(previous: dict, current: dict) -> list[str]:
+    previous_runs = {(run['mode'], run['validate']): run for run in previous['runs']}
+    report = []
+    for run in current['runs']:
+        old = previous_runs.get((run['mode'], run['validate']))
+        if old:
+            change = run['rows_per_second'] / old['rows_per_second'] - 1
+            report.append(f'{run["mode"]:<8}validate={run["validate"]!s:<6}{change:>+8.1%} rows/s')
+    return report
+
+
+def parse_args(configured: dict):
+    parser = ArgumentParser(description='Замер скорости переноса SQLite -> PostgreSQL')
+    parser.add_argument('--scale', choices=SCALES.keys(), default='10k')
+    parser.add_argument('--sqlite-db', help='готовая база SQLite, иначе генерируется синтетическая')
+    parser.add_argument('--output', default='benchmark-{:%Y-%m-%d-%H%M%S}.json'.format(datetime.now()))
+    parser.add_argument('--compare', help='JSON с результатами предыдущего замера')
+    parser.add_argument('--extract-only', action='store_true', help='замерить только извлечение из SQLite')
+    parser.add_argument('--dsn', help='строка подключения к отдельной базе PostgreSQL для замеров')
+    parser.add_argument(
+        '--truncate-target',
+        action='store_true',
+        help='подтверждение, что таблицы content в базе --dsn будут очищены перед каждым замером',
+    )
+    args = parser.parse_args()
+    if not args.extract_only:
+        if not args.dsn or not args.truncate_target:
+            parser.error('замер загрузки очищает таблицы: укажите --dsn отдельной базы и --truncate-target')
+        if same_database(args.dsn, configured):
+            parser.error('--dsn указывает на базу из .env, замер загрузки в неё запрещён')
+    return args
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    configured = {
+        'dbname': environ.get('DB_NAME'),
+        'host': environ.get('DB_HOST', '127.0.0.1'),
+        'port': environ.get('DB_PORT', 5432),
+    }
+    args = parse_args(configured)
+    dsl = {'dsn': args.dsn, 'options': '-c search_path=content'}
+    sqlite_db = args.sqlite_db or f'benchmark_{args.scale}.sqlite'
+    if not path.exists(sqlite_db):
+        generate_sqlite_fixture(sqlite_db, SCALES[args.scale])
+    log.setLevel(logging.WARNING)
+
+    results = {
+        'created': datetime.now().isoformat(),
+        'scale': args.scale,
+        'sqlite_db': sqlite_db,
+        'extraction_rows_per_second': {
+            'dataclass': measure_extraction(sqlite_db, validate=True),
+            'tuple': measure_extraction(sqlite_db, validate=False),
+        },
+        'runs': [],
+    }
+    for kind, rows_per_second in results['extraction_rows_per_second'].items():
+        print(f'extract {kind:<10}' + ' '.join(f'{table}={rate:,.0f}' for table, rate in rows_per_second.items()))
+    if not args.extract_only:
+        for mode, validate in VARIANTS:
+            run = run_isolated(measure_load, sqlite_db, dsl, mode, validate)
+            results['runs'].append(run)
+            print(f'{mode:<8}validate={validate!s:<6}{run["rows_per_second"]:>12,.0f} rows/s'
+                  f'{run["peak_rss_kb"] / 1024:>10.1f} MiB')
+            for table, stats in run['tables'].items():
+                print(f'    {table:<20}{stats["rows"]:>12}{stats["seconds"]:>10.2f} s')
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as previous:
+            print('\n'.join(compare_results(json.load(previous), results)))
@@ -0,0 +1,33 @@
+from project_logger import log
+from psycopg2.extensions import connection as postgres_connection
+from psycopg2.extensions import cursor as postgres_cursor
+from sql_queries import (
+    CLEAR_CHECKPOINTS_QUERY,
+    CREATE_CHECKPOINT_TABLE_QUERY,
+    SAVE_CHECKPOINT_QUERY,
+    SELECT_CHECKPOINTS_QUERY
+)
+
+
+class CheckpointJournal:
+    def __init__(self, connection: postgres_connection):
+        self.conn = connection
+        self.checkpoints: dict[tuple[str, int], int] = {}
+
+    def prepare(self, resume: bool) -> None:
+        with self.conn.cursor() as cursor:
+            cursor.execute(CREATE_CHECKPOINT_TABLE_QUERY)
+            if resume:
+                cursor.execute(SELECT_CHECKPOINTS_QUERY)
+                self.checkpoints = {(table, shard_start): last_rowid for table, shard_start, last_rowid in cursor}
+                log.info(f'Журнал: Продолжение переноса с {len(self.checkpoints)} сохранённых контрольных точек')
+            else:
+                cursor.execute(CLEAR_CHECKPOINTS_QUERY)
+        self.conn.commit()
+
+    def last_rowid(self, table: str, shard_start: int = 0) -> int:
+        return self.checkpoints.get((table, shard_start))
+
+    @staticmethod
+    def record(cursor: postgres_cursor, table: str, shard_start: int, last_rowid: int) -> None:
+        cursor.execute(SAVE_CHECKPOINT_QUERY, (table, shard_start, last_rowid))
@@ -3,11 +3,15 @@ from contextlib import contextmanager
 
 import psycopg2
 from psycopg2.extras import DictCursor
+from psycopg2.pool import ThreadedConnectionPool
 
 
 @contextmanager
-def open_sqlite_db(file_name: str):
-    conn = sqlite3.connect(file_name)
+def open_sqlite_db(file_name: str, read_only: bool = False):
+    if read_only:
+        conn = sqlite3.connect(f'file:{file_name}?mode=ro', uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(file_name, check_same_thread=False)
     try:
         yield conn
     finally:
@@ -23,3 +27,12 @@ def open_postgresql_db(dsl: dict):
     finally:
         conn.commit()
         conn.close()
+
+
+@contextmanager
+def open_postgresql_pool(dsl: dict, size: int):
+    pool = ThreadedConnectionPool(1, size, **dsl, cursor_factory=DictCursor)
+    try:
+        yield pool
+    finally:
+        pool.closeall()
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from context_managers import open_postgresql_db
+from project_logger import log
+from psycopg2 import Error
+from psycopg2.extensions import cursor as postgres_cursor
+from schema_mapping import MOVIE_MAPPING, TableMapping
+from sql_queries import (
+    ADD_CONSTRAINT_QUERY,
+    CREATE_DEFERRED_SCHEMA_TABLE_QUERY,
+    DROP_CONSTRAINT_QUERY,
+    DROP_INDEX_QUERY,
+    FOREIGN_KEY_DEFINITIONS_QUERY,
+    FORGET_DEFERRED_SCHEMA_QUERY,
+    SAVE_DEFERRED_SCHEMA_QUERY,
+    SECONDARY_INDEXES_QUERY,
+    SELECT_DEFERRED_SCHEMA_QUERY,
+    VALIDATE_CONSTRAINT_QUERY
+)
+
+INDEX = 'index'
+FOREIGN_KEY = 'foreign_key'
+
+
+@dataclass(frozen=True)
+class DeferredObject:
+    kind: str
+    table: str
+    name: str
+    definition: str
+
+
+class IndexDeferral:
+    def __init__(self, dsl: dict, workers: int = 4, mapping: dict[str, TableMapping] = None):
+        self.dsl = dsl
+        self.workers = workers
+        self.mapping = mapping or MOVIE_MAPPING
+
+    def drop(self) -> None:
+        with open_postgresql_db(self.dsl) as pg_conn, pg_conn.cursor() as cursor:
+            cursor.execute(CREATE_DEFERRED_SCHEMA_TABLE_QUERY)
+            pg_conn.commit()
+            self._restore_leftovers(cursor)
+            tables = list(self.mapping.keys())
+            cursor.execute(FOREIGN_KEY_DEFINITIONS_QUERY, (tables,))
+            deferred = [DeferredObject(FOREIGN_KEY, *row) for row in cursor.fetchall()]
+            cursor.execute(SECONDARY_INDEXES_QUERY, (tables,))
+            deferred += [DeferredObject(INDEX, *row) for row in cursor.fetchall()]
+            for item in deferred:
+                cursor.execute(SAVE_DEFERRED_SCHEMA_QUERY, (item.kind, item.table, item.name, item.definition))
+                if item.kind == FOREIGN_KEY:
+                    cursor.execute(DROP_CONSTRAINT_QUERY.format(table=item.table, name=item.name))
+                else:
+                    cursor.execute(DROP_INDEX_QUERY.format(name=item.name))
+            pg_conn.commit()
+        log.info(f'Схема: Отключены на время загрузки: {", ".join(item.name for item in deferred)}')
+
+    def restore(self) -> None:
+        with open_postgresql_db(self.dsl) as pg_conn, pg_conn.cursor() as cursor:
+            cursor.execute(SELECT_DEFERRED_SCHEMA_QUERY)
+            deferred = [DeferredObject(*row) for row in cursor.fetchall()]
+            for item in deferred:
+                if item.kind == FOREIGN_KEY:
+                    cursor.execute(DROP_CONSTRAINT_QUERY.format(table=item.table, name=item.name))
+                    cursor.execute(ADD_CONSTRAINT_QUERY.format(
+                        table=item.table,
+                        name=item.name,
+                        definition=item.definition,
+                    ))
+            pg_conn.commit()
+        indexes = [item for item in deferred if item.kind == INDEX]
+        foreign_keys = [item for item in deferred if item.kind == FOREIGN_KEY]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._rebuild, indexes + foreign_keys))
+        log.info('Схема: Индексы и внешние ключи восстановлены')
+
+    def _restore_leftovers(self, cursor: postgres_cursor) -> None:
+        cursor.execute(SELECT_DEFERRED_SCHEMA_QUERY)
+        if cursor.fetchone():
+            log.warning('Схема: Найдены индексы, не восстановленные после прошлого запуска')
+            self.restore()
+
+    def _rebuild(self, item: DeferredObject) -> None:
+        with open_postgresql_db(self.dsl) as pg_conn, pg_conn.cursor() as cursor:
+            try:
+                if item.kind == FOREIGN_KEY:
+                    cursor.execute(VALIDATE_CONSTRAINT_QUERY.format(table=item.table, name=item.name))
+                else:
+                    cursor.execute(item.definition)
+                cursor.execute(FORGET_DEFERRED_SCHEMA_QUERY, (item.kind, item.name))
+                pg_conn.commit()
+            except Error as err:
+                log.critical(f'Схема: Не удалось восстановить "{item.name}": {err}')
+                pg_conn.rollback()
+                raise
+        log.info(f'Схема: Восстановлен "{item.name}" на таблице "{item.table}"')
+
+
+@contextmanager
+def deferred_indexes(dsl: dict, workers: int = 4, mapping: dict[str, TableMapping] = None):
+    deferral = IndexDeferral(dsl, workers, mapping)
+    deferral.drop()
+    try:
+        yield deferral
+    except BaseException:
+        try:
+            deferral.restore()
+        except Exception as err:
+            log.critical(f'Схема: Не удалось восстановить индексы после ошибки загрузки, '
+                         f'они будут восстановлены при следующем запуске: {err}')
+        raise
+    deferral.restore()
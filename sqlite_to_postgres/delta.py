@@ -0,0 +1,112 @@
+from datetime import date
+from hashlib import md5
+from typing import Generator
+
+from loaders import BATCH_SIZE, Batch, as_tuples
+from project_logger import log
+from psycopg2 import sql
+from psycopg2.extensions import connection as postgres_connection
+from psycopg2.extensions import cursor as postgres_cursor
+from schema_mapping import MOVIE_MAPPING, TableMapping, identifiers, source_date
+from sql_queries import (
+    CREATE_SEEN_IDS_QUERY,
+    DELETE_IDS_QUERY,
+    DELETE_MISSING_QUERY,
+    INSERT_SEEN_IDS_QUERY,
+    SELECT_FINGERPRINT_QUERY
+)
+
+FIELD_SEPARATOR = '\x1f'
+NULL_MARKER = '\x00'
+
+
+def fingerprint(values: tuple, parameter_types: tuple) -> bytes:
+    return md5(FIELD_SEPARATOR.join(map(_normalize, values, parameter_types)).encode()).digest()
+
+
+def _normalize(value, parameter_type: str) -> str:
+    if value is None:
+        return NULL_MARKER
+    if parameter_type == 'date':
+        value = source_date(value)
+        return value.isoformat() if isinstance(value, date) else value
+    if parameter_type == 'uuid':
+        return str(value).strip().lower()
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    return str(value)
+
+
+def seen_ids_table(table: str) -> sql.Identifier:
+    return sql.Identifier(f'delta_seen_{table}')
+
+
+class DeltaSync:
+    def __init__(
+        self,
+        connection: postgres_connection,
+        mapping: dict[str, TableMapping] = None,
+        track_missing: bool = False,
+    ):
+        self.conn = connection
+        self.mapping = mapping or MOVIE_MAPPING
+        self.track_missing = track_missing
+        self.tracked: list[str] = []
+
+    def filter_table(self, data: Generator[Batch, None, None], table: str) -> Generator[Batch, None, None]:
+        mapping = self.mapping[table]
+        id_index = mapping.columns.index('id')
+        changed_total = replaced_total = 0
+        with self.conn.cursor() as cursor:
+            if self.track_missing:
+                cursor.execute(sql.SQL(CREATE_SEEN_IDS_QUERY).format(seen=seen_ids_table(table)))
+                self.tracked.append(table)
+            for batch in data:
+                rows = as_tuples(batch.rows)
+                ids = [values[id_index] for values in rows]
+                known = self._load_fingerprints(cursor, mapping, ids)
+                changed = [
+                    position for position, values in enumerate(rows)
+                    if known.get(values[id_index]) != fingerprint(values, mapping.parameter_types)
+                ]
+                if mapping.natural_key:
+                    replaced_total += self._delete_ids(
+                        cursor, mapping, [ids[position] for position in changed if ids[position] in known],
+                    )
+                if self.track_missing:
+                    cursor.execute(sql.SQL(INSERT_SEEN_IDS_QUERY).format(seen=seen_ids_table(table)), (ids,))
+                changed_total += len(changed)
+                yield Batch([batch.rows[position] for position in changed], batch.last_rowid)
+        log.info(f'Дельта: В таблице "{table}" новых или изменённых записей {changed_total}, '
+                 f'заменено по естественному ключу {replaced_total}')
+
+    def delete_missing(self) -> None:
+        with self.conn.cursor() as cursor:
+            for table in reversed(self.mapping.keys()):
+                if table not in self.tracked:
+                    continue
+                cursor.execute(sql.SQL(DELETE_MISSING_QUERY).format(
+                    table=self.mapping[table].target, seen=seen_ids_table(table),
+                ))
+                log.info(f'Дельта: Удалено {cursor.rowcount} отсутствующих в SQLite записей из таблицы "{table}"')
+        self.conn.commit()
+
+    @staticmethod
+    def _load_fingerprints(cursor: postgres_cursor, mapping: TableMapping, ids: list[str]) -> dict[str, bytes]:
+        if not ids:
+            return {}
+        id_index = mapping.columns.index('id')
+        cursor.execute(
+            sql.SQL(SELECT_FINGERPRINT_QUERY).format(columns=identifiers(mapping.columns), table=mapping.target),
+            (ids,),
+        )
+        return {row[id_index]: fingerprint(row, mapping.parameter_types) for row in cursor.fetchall()}
+
+    @staticmethod
+    def _delete_ids(cursor: postgres_cursor, mapping: TableMapping, ids: list[str]) -> int:
+        query = sql.SQL(DELETE_IDS_QUERY).format(table=mapping.target)
+        deleted = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            cursor.execute(query, (ids[start:start + BATCH_SIZE],))
+            deleted += cursor.rowcount
+        return deleted
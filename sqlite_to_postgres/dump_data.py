@@ -0,0 +1,67 @@
+import sqlite3
+from argparse import ArgumentParser
+from os import environ, path, remove, replace
+
+from context_managers import open_postgresql_db, open_sqlite_db
+from dotenv import load_dotenv
+from loaders import EXPORT_ITERSIZE, PostgresExtractor, SQLiteSaver
+from metrics import metrics
+from movies_dataclasses import MOVIE_DATACLASS
+from psycopg2.extensions import connection as postgres_connection
+
+
+def dump_to_sqlite(pg_connection: postgres_connection, sqlite_connection: sqlite3.Connection, itersize: int) -> None:
+    extractor = PostgresExtractor(pg_connection, itersize)
+    sqlite_saver = SQLiteSaver(sqlite_connection)
+    sqlite_saver.prepare()
+    with extractor.snapshot():
+        for table in MOVIE_DATACLASS.keys():
+            sqlite_saver.save_table(extractor.extract_table(table), table)
+
+
+def export_snapshot(dsl: dict, output: str, itersize: int = EXPORT_ITERSIZE) -> None:
+    build_file, compact_file = f'{output}.build', f'{output}.tmp'
+    remove_if_exists(build_file)
+    remove_if_exists(compact_file)
+    try:
+        with open_sqlite_db(build_file) as sqlite_conn, open_postgresql_db(dsl) as pg_conn:
+            dump_to_sqlite(pg_conn, sqlite_conn, itersize)
+            SQLiteSaver(sqlite_conn).compact(compact_file)
+        replace(compact_file, output)
+    finally:
+        remove_if_exists(build_file)
+        remove_if_exists(compact_file)
+
+
+def remove_if_exists(file_name: str) -> None:
+    if path.exists(file_name):
+        remove(file_name)
+
+
+def parse_args():
+    parser = ArgumentParser(description='Выгрузка каталога из PostgreSQL в снимок SQLite')
+    parser.add_argument('output', help='файл итогового снимка SQLite, заменяется только после успешной выгрузки')
+    parser.add_argument(
+        '--itersize',
+        type=int,
+        default=EXPORT_ITERSIZE,
+        help='число записей, получаемых с сервера за один раз через именованный курсор',
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    load_dotenv()
+    dsl = {
+        'dbname': environ.get('DB_NAME'),
+        'user': environ.get('DB_USER'),
+        'password': environ.get('DB_PASSWORD'),
+        'host': environ.get('DB_HOST', '127.0.0.1'),
+        'port': environ.get('DB_PORT', 5432),
+        'options': '-c search_path=content',
+    }
+    try:
+        export_snapshot(dsl, args.output, args.itersize)
+    finally:
+        metrics.log_summary()
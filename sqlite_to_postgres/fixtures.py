@@ -0,0 +1,120 @@
+import random
+import sqlite3
+from argparse import ArgumentParser
+from itertools import islice
+from typing import Iterator
+from uuid import UUID
+
+from project_logger import log
+from sql_queries import SQLITE_SCHEMA
+
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+GENRES = 30
+GENRES_PER_FILM = (1, 3)
+PERSONS_PER_FILM = (2, 9)
+PERSON_REUSE = 0.4
+ROLES = ('actor', 'actor', 'actor', 'director', 'screenwriter', 'producer')
+FILM_TYPES = ('movie', 'movie', 'movie', 'tv_show')
+INSERT_CHUNK = 50_000
+
+
+def films_for_scale(total_rows: int) -> int:
+    rows_per_film = 1 + sum(GENRES_PER_FILM) / 2 + sum(PERSONS_PER_FILM) / 2 * (2 - PERSON_REUSE)
+    return max(int(total_rows / rows_per_film), 1)
+
+
+def generate_sqlite_fixture(file_name: str, total_rows: int, seed: int = 0) -> dict[str, int]:
+    rnd = random.Random(seed)
+    counts = dict.fromkeys(('film_work', 'genre', 'person', 'genre_film_work', 'person_film_work'), 0)
+    conn = sqlite3.connect(file_name)
+    try:
+        conn.executescript(SQLITE_SCHEMA)
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        genres = [_uuid(rnd) for _ in range(GENRES)]
+        counts['genre'] = _insert(conn, 'INSERT INTO genre (id, name, description) VALUES (?, ?, ?)', (
+            (genre_id, f'Genre {number}', f'Description of genre {number}')
+            for number, genre_id in enumerate(genres)
+        ))
+        persons: list[str] = []
+        for films in _chunks((_uuid(rnd) for _ in range(films_for_scale(total_rows))), INSERT_CHUNK):
+            counts['film_work'] += _insert(
+                conn,
+                '''INSERT INTO film_work (id, title, description, creation_date, rating, type)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                (_film_row(rnd, film_id) for film_id in films),
+            )
+            counts['genre_film_work'] += _insert(
+                conn,
+                'INSERT INTO genre_film_work (id, film_work_id, genre_id) VALUES (?, ?, ?)',
+                (
+                    (_uuid(rnd), film_id, genre_id)
+                    for film_id in films
+                    for genre_id in rnd.sample(genres, rnd.randint(*GENRES_PER_FILM))
+                ),
+            )
+            links, new_persons = _person_links(rnd, films, persons)
+            counts['person'] += _insert(
+                conn,
+                'INSERT INTO person (id, full_name) VALUES (?, ?)',
+                ((person_id, f'Person {person_id[:8]}') for person_id in new_persons),
+            )
+            counts['person_film_work'] += _insert(
+                conn,
+                'INSERT INTO person_film_work (id, film_work_id, person_id, role) VALUES (?, ?, ?, ?)',
+                links,
+            )
+            conn.commit()
+            log.info(f'Фикстура: Сгенерировано {counts["film_work"]} фильмов')
+    finally:
+        conn.commit()
+        conn.close()
+    return counts
+
+
+def _uuid(rnd: random.Random) -> str:
+    return str(UUID(int=rnd.getrandbits(128), version=4))
+
+
+def _film_row(rnd: random.Random, film_id: str) -> tuple:
+    rating = round(rnd.uniform(0, 10), 1) if rnd.random() > 0.05 else None
+    description = ' '.join(rnd.choices(('lorem', 'ipsum', 'dolor', 'sit', 'amet'), k=rnd.randint(0, 120)))
+    creation_date = f'{rnd.randint(1950, 2022)}-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}'
+    return film_id, f'Film {film_id[:8]}', description, creation_date, rating, rnd.choice(FILM_TYPES)
+
+
+def _person_links(rnd: random.Random, films: list[str], persons: list[str]) -> tuple[list[tuple], list[str]]:
+    links, new_persons = [], []
+    for film_id in films:
+        cast_size = rnd.randint(*PERSONS_PER_FILM)
+        reused = sum(rnd.random() < PERSON_REUSE for _ in range(cast_size))
+        cast = rnd.sample(persons, min(reused, len(persons)))
+        created = [_uuid(rnd) for _ in range(cast_size - len(cast))]
+        persons.extend(created)
+        new_persons.extend(created)
+        links.extend((_uuid(rnd), film_id, person_id, rnd.choice(ROLES)) for person_id in cast + created)
+    return links, new_persons
+
+
+def _chunks(iterable: Iterator, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _insert(conn: sqlite3.Connection, query: str, rows: Iterator[tuple]) -> int:
+    cursor = conn.executemany(query, rows)
+    return cursor.rowcount
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Генерация синтетической базы SQLite для замеров переноса')
+    parser.add_argument('sqlite_db')
+    parser.add_argument('--scale', choices=SCALES.keys(), default='10k')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    log.info(f'Фикстура: {generate_sqlite_fixture(args.sqlite_db, SCALES[args.scale], args.seed)}')
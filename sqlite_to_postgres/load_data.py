@@ -1,20 +1,225 @@
 import sqlite3
+from argparse import ArgumentParser
+from contextlib import nullcontext
 from os import environ
 
+from async_loader import load_from_sqlite_async
+from checkpoints import CheckpointJournal
 from context_managers import open_postgresql_db, open_sqlite_db
+from deferral import deferred_indexes
+from delta import DeltaSync
 from dotenv import load_dotenv
-from loaders import PostgresSaver, SQLiteExtractor
+from loaders import LOAD_MODES, PostgresSaver, SQLiteExtractor
+from metrics import metrics
+from normalization import BatchNormalizer, batch_normalizer
+from options import LoadOptions
+from pipeline import PipelinedRunner
 from psycopg2.extensions import connection as postgres_connection
+from references import ReferenceGuard, reference_guard
+from scheduler import TableScheduler
+from schema_mapping import MOVIE_MAPPING, TableMapping, active_mapping, introspect_mapping
+from search_projection import refreshed_search_projection
+from staging import ArrowExtractor
 
 
-def load_from_sqlite(sqlite_connection: sqlite3.Connection, pg_connection: postgres_connection):
-    sqlite_extractor = SQLiteExtractor(sqlite_connection)
-    data = sqlite_extractor.extract_movies()
-    postgres_saver = PostgresSaver(pg_connection)
-    postgres_saver.save_all_data(data)
+def load_from_sqlite(
+    sqlite_connection: sqlite3.Connection,
+    pg_connection: postgres_connection,
+    options: LoadOptions = None,
+):
+    options = options or LoadOptions()
+    mapping = introspect_mapping(sqlite_connection, pg_connection) if options.introspect else MOVIE_MAPPING
+    with reference_guard(options.quarantine_file, mapping) as guard:
+        if guard:
+            guard.seed(pg_connection)
+        with batch_normalizer(options.normalize, guard.quarantine if guard else None) as normalizer:
+            load_tables(sqlite_connection, pg_connection, options, mapping, guard, normalizer)
+
+
+def load_tables(
+    sqlite_connection: sqlite3.Connection,
+    pg_connection: postgres_connection,
+    options: LoadOptions,
+    mapping: dict[str, TableMapping],
+    guard: ReferenceGuard = None,
+    normalizer: BatchNormalizer = None,
+):
+    journal = CheckpointJournal(pg_connection)
+    journal.prepare(options.resume)
+    delta_sync = DeltaSync(pg_connection, mapping, options.delete_missing) if options.delta else None
+    runner = PipelinedRunner(options.queue_depth) if options.queue_depth else None
+    for table in mapping:
+        controller = options.batch_controller(table)
+        memory_budget = options.memory_budget(table)
+        if options.staging_dir:
+            extractor = ArrowExtractor(options.staging_dir, controller, memory_budget)
+        else:
+            extractor = SQLiteExtractor(sqlite_connection, options.validate, controller, memory_budget, mapping)
+        data = extractor.extract_table(table, after_rowid=journal.last_rowid(table))
+        transform = normalizer.transform(table, mapping) if normalizer else None
+        if runner:
+            data = runner.run(data, table, transform)
+        elif transform:
+            data = map(transform, data)
+        if guard:
+            data = guard.check(data, table)
+        if delta_sync:
+            data = delta_sync.filter_table(data, table)
+        postgres_saver = PostgresSaver(
+            pg_connection, options.mode, journal, options.delta, controller, options.prepare,
+            guard.quarantine if guard else None, mapping, guard.on_written if guard else None,
+        )
+        postgres_saver.save_table(data, table)
+    if delta_sync and options.delete_missing:
+        delta_sync.delete_missing()
+
+
+def parse_args():
+    parser = ArgumentParser(description='Перенос данных из SQLite в PostgreSQL')
+    parser.add_argument(
+        '--mode',
+        choices=LOAD_MODES,
+        default='insert',
+        help='insert - пачки INSERT ... ON CONFLICT, copy - COPY во временную таблицу и слияние',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='количество таблиц, переносимых одновременно с учётом внешних ключей',
+    )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=1,
+        help='на сколько диапазонов rowid делить каждую таблицу (больше 1 включает планировщик таблиц)',
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='продолжить прерванный перенос с первой незафиксированной пачки',
+    )
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='переносить только новые и изменённые записи с обновлением существующих',
+    )
+    parser.add_argument(
+        '--delete-missing',
+        action='store_true',
+        help='в режиме --delta удалять из PostgreSQL записи, отсутствующие в SQLite',
+    )
+    parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='проверять записи через dataclass вместо быстрой передачи кортежей',
+    )
+    parser.add_argument(
+        '--queue-depth',
+        type=int,
+        default=0,
+        help='читать SQLite в отдельном потоке, держа в очереди не больше N пачек (0 - без конвейера)',
+    )
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='подбирать размер пачки и частоту фиксации по измеренной длительности фиксации',
+    )
+    parser.add_argument(
+        '--target-commit-seconds',
+        type=float,
+        default=0.5,
+        help='целевая длительность одной фиксации в режиме --adaptive',
+    )
+    parser.add_argument(
+        '--commit-byte-budget',
+        type=int,
+        default=None,
+        help='максимальный объём данных одной фиксации в байтах в режиме --adaptive',
+    )
+    parser.add_argument(
+        '--defer-indexes',
+        action='store_true',
+        help='удалить вторичные индексы и внешние ключи на время загрузки и восстановить их после',
+    )
+    parser.add_argument(
+        '--staging-dir',
+        default=None,
+        help='загружать из файлов Parquet/Arrow, выгруженных staging.py, вместо SQLite',
+    )
+    parser.add_argument(
+        '--memory-limit',
+        type=int,
+        default=None,
+        help='предел памяти в байтах на все пачки в обработке, размер пачки подбирается по ширине записей',
+    )
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='асинхронная загрузка через asyncpg: пачки пишутся параллельно через пул соединений',
+    )
+    parser.add_argument(
+        '--no-prepare',
+        dest='prepare',
+        action='store_false',
+        help='не использовать подготовленные запросы в режиме insert, например за PgBouncer в режиме транзакций',
+    )
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='файл для метрик в текстовом формате Prometheus (node_exporter textfile collector)',
+    )
+    parser.add_argument(
+        '--metrics-summary',
+        default=None,
+        help='файл для итоговой сводки метрик в формате JSON',
+    )
+    parser.add_argument(
+        '--no-search-refresh',
+        dest='refresh_search',
+        action='store_false',
+        help='не обновлять поисковую проекцию content.film_work_search после загрузки',
+    )
+    parser.add_argument(
+        '--quarantine-file',
+        default=None,
+        help='проверять ссылки до записи, а отвергнутые PostgreSQL пачки делить пополам и сохранять '
+             'записи-сироты и ошибочные записи в этот файл JSONL вместо остановки переноса',
+    )
+    parser.add_argument(
+        '--introspect',
+        action='store_true',
+        help='строить список таблиц и столбцов по схемам SQLite и PostgreSQL вместо встроенного описания',
+    )
+    parser.add_argument(
+        '--normalize',
+        action='store_true',
+        help='проверять и приводить UUID, даты, рейтинг, тип и роль целыми столбцами пачки до записи '
+             '(нужен pyarrow), недопустимые записи попадают в отчёт и в --quarantine-file',
+    )
+    args = parser.parse_args()
+    if args.use_async and (args.delta or args.resume or args.shards > 1):
+        parser.error('--async несовместим с --delta, --resume и --shards')
+    if args.use_async and (args.mode == 'copy' or args.adaptive or args.memory_limit or not args.prepare):
+        parser.error('--async пишет подготовленными INSERT и несовместим с --mode copy, --adaptive, '
+                     '--memory-limit и --no-prepare')
+    if args.delete_missing and (args.resume or not args.delta):
+        parser.error('--delete-missing требует --delta и несовместим с --resume')
+    if args.introspect and (args.validate or args.staging_dir):
+        parser.error('--introspect несовместим с --validate и --staging-dir: их записи построены по dataclass')
+    if args.normalize and (args.validate or args.use_async or not args.quarantine_file):
+        parser.error('--normalize требует --quarantine-file и несовместим с --validate и --async')
+    if args.delta and (args.workers > 1 or args.shards > 1):
+        parser.error('--delta поддерживается только при --workers 1 и --shards 1')
+    if args.delta and args.defer_indexes:
+        parser.error('--delta несовместим с --defer-indexes: upsert связей опирается на уникальные индексы '
+                     'естественных ключей')
+    return args
 
 
 if __name__ == '__main__':
+    args = parse_args()
     load_dotenv()
     dsl = {
         'dbname': environ.get('DB_NAME'),
@@ -26,5 +231,27 @@ if __name__ == '__main__':
     }
     SQLITE_DB = environ.get('SQLT_DB_NAME')
 
-    with open_sqlite_db(SQLITE_DB) as sqlite_conn, open_postgresql_db(dsl) as pg_conn:
-        load_from_sqlite(sqlite_conn, pg_conn)
+    options = LoadOptions.from_args(args)
+    full_refresh = options.resume or options.delete_missing
+    search_projection = refreshed_search_projection(dsl, full_refresh) if args.refresh_search else nullcontext()
+    if options.defer_indexes:
+        mapping = active_mapping(SQLITE_DB, dsl, options.introspect)
+        index_deferral = deferred_indexes(dsl, max(options.workers, 2), mapping)
+    else:
+        index_deferral = nullcontext()
+    try:
+        with search_projection, index_deferral:
+            if options.use_async:
+                load_from_sqlite_async(SQLITE_DB, dsl, options)
+            elif options.workers > 1 or options.shards > 1:
+                TableScheduler(SQLITE_DB, dsl, options).run()
+            else:
+                sqlite_db = nullcontext() if options.staging_dir else open_sqlite_db(SQLITE_DB)
+                with sqlite_db as sqlite_conn, open_postgresql_db(dsl) as pg_conn:
+                    load_from_sqlite(sqlite_conn, pg_conn, options)
+    finally:
+        metrics.log_summary()
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        if args.metrics_summary:
+            metrics.write_summary(args.metrics_summary)
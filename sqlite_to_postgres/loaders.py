@@ -1,75 +1,452 @@
 import sqlite3
-from dataclasses import astuple, dataclass
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass, is_dataclass
+from io import StringIO
 from sqlite3 import DatabaseError, Row
-from typing import Generator
+from sys import intern
+from time import perf_counter
+from typing import Callable, Generator
 
+from batching import AdaptiveBatchController, MemoryBudget, estimate_bytes
+from checkpoints import CheckpointJournal
+from metrics import metrics
+from movies_dataclasses import INTERNED_FIELDS, MOVIE_DATACLASS
 from project_logger import log
-from movies_dataclasses import MOVIE_DATACLASS
-from psycopg2 import Error
+from psycopg2 import DataError, Error, IntegrityError, sql
 from psycopg2.extensions import connection as postgres_connection
+from psycopg2.extensions import cursor as postgres_cursor
 from psycopg2.extras import execute_batch
-from sql_queries import INSERT_QUERY
+from quarantine import QuarantineStore
+from schema_mapping import MOVIE_MAPPING, TableMapping, sqlite_identifier, without_rowid
+from sql_queries import (
+    EXECUTE_PREPARED_QUERY,
+    EXPORT_QUERY,
+    PREPARE_QUERY,
+    PREPARED_STATEMENT_EXISTS_QUERY,
+    RELEASE_SAVEPOINT_QUERY,
+    ROLLBACK_TO_SAVEPOINT_QUERY,
+    SAVEPOINT_QUERY,
+    SET_UTC_TIME_ZONE_QUERY,
+    SNAPSHOT_TRANSACTION_QUERY,
+    SQLITE_INSERT_QUERY,
+    SQLITE_SCHEMA
+)
 
 BATCH_SIZE = 500
+EXPORT_ITERSIZE = 20000
+LOAD_MODES = ('insert', 'copy')
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+COPY_NULL = '\\N'
+
+
+@dataclass
+class Batch:
+    rows: list
+    last_rowid: int
+
+
+@dataclass
+class PendingCommit:
+    seconds: float = 0.0
+    batches: int = 0
+    rows: int = 0
+    size: int = 0
+    last_rowid: int = None
+
+    def add(self, batch: Batch, size: int, seconds: float) -> None:
+        self.batches += 1
+        self.rows += len(batch.rows)
+        self.size += size
+        self.seconds += seconds
+        self.last_rowid = batch.last_rowid
 
 
 class PostgresSaver:
-    def __init__(self, connection: postgres_connection):
+    def __init__(
+        self,
+        connection: postgres_connection,
+        mode: str = 'insert',
+        journal: CheckpointJournal = None,
+        upsert: bool = False,
+        controller: AdaptiveBatchController = None,
+        prepare: bool = True,
+        dead_letters: QuarantineStore = None,
+        mapping: dict[str, TableMapping] = None,
+        on_written: Callable[[str, list], None] = None,
+    ):
         self.conn = connection
         self.cursor = self.conn.cursor()
         self.batch_size = BATCH_SIZE
+        self.mode = mode
+        self.journal = journal
+        self.upsert = upsert
+        self.statement_prefix = 'upsert' if upsert else 'insert'
+        self.prepare = prepare
+        self.mapping = mapping or MOVIE_MAPPING
+        self.controller = controller
+        self.dead_letters = dead_letters
+        self.on_written = on_written
 
     def save_all_data(self, data: dict[str, dataclass]):
+        for table in MOVIE_DATACLASS.keys():
+            self.save_table(data[table], table)
+
+    def save_table(self, data: Generator[Batch, None, None], table: str, shard_start: int = 0) -> None:
         try:
-            for table in MOVIE_DATACLASS.keys():
-                self._insert_to_table(data[table], table)
+            if self.mode == 'copy':
+                self._copy_to_table(data, table, shard_start)
+            else:
+                self._insert_to_table(data, table, shard_start)
         except Error as err:
+            metrics.record_error(table, 'write')
             log.critical(f'Во время вставки данных в movies_database произошла ошибка: {err}')
             self.conn.rollback()
             raise
 
-    def _insert_to_table(self, data: Generator[tuple, None, None], table: str) -> None:
+    def _insert_to_table(self, data: Generator[Batch, None, None], table: str, shard_start: int) -> None:
         log.info(f'Postgres: Очищена таблица "{table}"')
-        for item in data:
-            item = self._convert_dataclass_to_tuple(item)
-            execute_batch(self.cursor, INSERT_QUERY[table], item, page_size=BATCH_SIZE)
-            self.conn.commit()
-            log.info(f'Postgres: Сохранены записи в таблицу "{table}"')
+        mapping = self.mapping[table]
+        if self.prepare:
+            query = self._prepared_statement(mapping)
+        else:
+            query = mapping.insert_query(self.upsert).as_string(self.conn)
+        pending = PendingCommit()
+        for batch in data:
+            started = perf_counter()
+            item = self._convert_dataclass_to_tuple(batch.rows)
+            written = self._write_rows(
+                table, item, lambda rows: execute_batch(self.cursor, query, rows, page_size=self._page_size()),
+            )
+            seconds = perf_counter() - started
+            metrics.record(table, 'write', written, seconds)
+            pending.add(batch, estimate_bytes(item), seconds)
+            if pending.batches >= self._commit_interval():
+                self._commit(table, shard_start, pending)
+                pending = PendingCommit()
+        if pending.batches:
+            self._commit(table, shard_start, pending)
+
+    def _copy_to_table(self, data: Generator[Batch, None, None], table: str, shard_start: int) -> None:
+        pending = PendingCommit()
+        for batch in data:
+            if not pending.batches:
+                self.cursor.execute(self.mapping[table].create_staging_query())
+            started = perf_counter()
+            item = self._convert_dataclass_to_tuple(batch.rows)
+            written = self._write_rows(table, item, lambda rows: self._copy_rows(table, rows))
+            seconds = perf_counter() - started
+            metrics.record(table, 'write', written, seconds)
+            pending.add(batch, estimate_bytes(item), seconds)
+            log.info(
+                'Postgres: Скопированы записи во временную таблицу "staging_%s"', table,
+                extra={'table': table, 'batch': pending.batches, 'rows': len(batch.rows)},
+            )
+            if self.controller and pending.batches >= self.controller.commit_interval:
+                self._merge(table, shard_start, pending)
+                pending = PendingCommit()
+        if pending.batches:
+            self._merge(table, shard_start, pending)
+
+    def _copy_rows(self, table: str, rows: list) -> None:
+        self.cursor.copy_expert(
+            self.mapping[table].copy_query().as_string(self.conn), self._convert_dataclass_to_copy_buffer(rows),
+        )
+
+    def _write_rows(self, table: str, rows: list, write: Callable[[list], None]) -> int:
+        if not self.dead_letters:
+            write(rows)
+            self._written(table, rows)
+            return len(rows)
+        self.cursor.execute(SAVEPOINT_QUERY)
+        try:
+            write(rows)
+        except (DataError, IntegrityError) as err:
+            self.cursor.execute(ROLLBACK_TO_SAVEPOINT_QUERY)
+            metrics.record_retry(table, 'write')
+            if len(rows) == 1:
+                self.dead_letters.add(table, rows[0], str(err).strip())
+                return 0
+            middle = len(rows) // 2
+            return self._write_rows(table, rows[:middle], write) + self._write_rows(table, rows[middle:], write)
+        self.cursor.execute(RELEASE_SAVEPOINT_QUERY)
+        self._written(table, rows)
+        return len(rows)
+
+    def _written(self, table: str, rows: list) -> None:
+        if self.on_written:
+            self.on_written(table, rows)
+
+    def _prepared_statement(self, mapping: TableMapping) -> str:
+        name = f'{self.statement_prefix}_{mapping.table}'
+        self.cursor.execute(PREPARED_STATEMENT_EXISTS_QUERY, (name,))
+        if not self.cursor.fetchone():
+            self.cursor.execute(sql.SQL(PREPARE_QUERY).format(
+                name=sql.Identifier(name),
+                types=sql.SQL(', ').join(map(sql.SQL, mapping.parameter_types)),
+                query=mapping.insert_query(self.upsert, numbered=True),
+            ))
+            log.info(f'Postgres: Подготовлен запрос "{name}"')
+        return sql.SQL(EXECUTE_PREPARED_QUERY).format(
+            name=sql.Identifier(name),
+            placeholders=sql.SQL(', ').join([sql.Placeholder()] * len(mapping.columns)),
+        ).as_string(self.conn)
 
-    def _convert_dataclass_to_tuple(self, data: tuple) -> Generator[tuple, None, None]:
-        return (astuple(movie) for movie in data)
+    def _merge(self, table: str, shard_start: int, pending: PendingCommit) -> None:
+        started = perf_counter()
+        self.cursor.execute(self.mapping[table].merge_query(self.upsert))
+        merged = self.cursor.rowcount
+        seconds = perf_counter() - started
+        metrics.record(table, 'merge', merged, seconds)
+        pending.seconds += seconds
+        self._commit(table, shard_start, pending)
+        log.info(
+            'Postgres: Перенесено %d записей в таблицу "%s"', merged, table,
+            extra={'table': table, 'rows': merged},
+        )
+
+    def _commit(self, table: str, shard_start: int, pending: PendingCommit) -> None:
+        started = perf_counter()
+        self._save_checkpoint(table, shard_start, pending.last_rowid)
+        self.conn.commit()
+        seconds = perf_counter() - started
+        metrics.record(table, 'commit', pending.rows, seconds)
+        pending.seconds += seconds
+        log.info(
+            'Postgres: Сохранены записи в таблицу "%s"', table,
+            extra={'table': table, 'batch': pending.batches, 'rows': pending.rows,
+                   'duration': pending.seconds},
+        )
+        if self.controller:
+            self.controller.record_commit(pending.rows, pending.seconds, pending.size)
+
+    def _page_size(self) -> int:
+        return self.controller.page_size if self.controller else BATCH_SIZE
+
+    def _commit_interval(self) -> int:
+        return self.controller.commit_interval if self.controller else 1
+
+    def _save_checkpoint(self, table: str, shard_start: int, last_rowid: int) -> None:
+        if self.journal and last_rowid is not None:
+            self.journal.record(self.cursor, table, shard_start, last_rowid)
+
+    def _convert_dataclass_to_tuple(self, data: list) -> Generator[tuple, None, None]:
+        return as_tuples(data)
+
+    def _convert_dataclass_to_copy_buffer(self, data: list) -> StringIO:
+        buffer = StringIO()
+        for row in self._convert_dataclass_to_tuple(data):
+            fields = (COPY_NULL if value is None else str(value).translate(COPY_ESCAPES) for value in row)
+            buffer.write('\t'.join(fields))
+            buffer.write('\n')
+        buffer.seek(0)
+        return buffer
+
+
+def split_rowid_range(min_rowid: int, max_rowid: int, shards: int) -> list[tuple[int, int]]:
+    if min_rowid is None:
+        return []
+    step = -(-(max_rowid - min_rowid + 1) // max(shards, 1))
+    return [(start, min(start + step - 1, max_rowid)) for start in range(min_rowid, max_rowid + 1, step)]
+
+
+def as_tuples(rows: list) -> list:
+    if rows and is_dataclass(rows[0]):
+        return [astuple(row) for row in rows]
+    return rows
 
 
 class SQLiteExtractor:
-    def __init__(self, connection: sqlite3.Connection):
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        validate: bool = False,
+        controller: AdaptiveBatchController = None,
+        memory_budget: MemoryBudget = None,
+        mapping: dict[str, TableMapping] = None,
+    ):
         self.conn = connection
-        self.conn.row_factory = Row
+        self.validate = validate
+        self.controller = controller
+        self.memory_budget = memory_budget
+        self.mapping = mapping or MOVIE_MAPPING
+        self.conn.row_factory = Row if validate else None
         self.cursor = self.conn.cursor()
 
-    def extract_movies(self):
+    def extract_movies(self, after_rowids: dict[str, int] = None):
+        after_rowids = after_rowids or {}
+        return {
+            table: self.extract_table(table, after_rowid=after_rowids.get(table))
+            for table in MOVIE_DATACLASS.keys()
+        }
+
+    def extract_table(
+        self,
+        table: str,
+        rowid_range: tuple[int, int] = None,
+        after_rowid: int = None,
+    ) -> Generator[Batch, None, None]:
+        if self.validate:
+            data = self.__select_from_table_to_dataclass(table, MOVIE_DATACLASS[table], rowid_range, after_rowid)
+        else:
+            data = self.__select_from_table_to_tuples(
+                table, self.mapping[table].select_columns, rowid_range, after_rowid,
+            )
         try:
-            movies_data = {}
-            for table, movie_dataclass in MOVIE_DATACLASS.items():
-                movies_data[table] = self.__select_from_table_to_dataclass(table, movie_dataclass)
-            return movies_data
+            yield from metrics.timed_batches(data, table, 'extract')
         except DatabaseError as err:
+            metrics.record_error(table, 'extract')
             log.critical(f'Во время извлечения данных из SQLite произошла ошибка: {err}')
             self.conn.rollback()
             raise
 
-    def __select_from_table_to_dataclass(self, table: str, movie_dataclass: dataclass):
-        self.cursor.execute(f'SELECT * FROM {table};')
+    def shard_bounds(self, table: str, shards: int) -> list[tuple[int, int]]:
+        self.cursor.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {sqlite_identifier(table)};')
+        return split_rowid_range(*self.cursor.fetchone(), shards)
+
+    def __select_from_table_to_dataclass(
+        self,
+        table: str,
+        movie_dataclass: dataclass,
+        rowid_range: tuple = None,
+        after_rowid: int = None,
+    ):
+        source = self.__execute_select(table, '*', rowid_range, after_rowid)
+        dataclass_fields = list(movie_dataclass.__annotations__.keys())
+        interned_fields = [field in INTERNED_FIELDS for field in dataclass_fields]
         list_of_dataclasses = []
+        extracted = batches = 0
         while True:
-            persons = self.cursor.fetchmany(BATCH_SIZE)
+            persons = self.cursor.fetchmany(self.__fetch_size())
             if persons:
                 for person in persons:
-                    dataclass_fields = movie_dataclass.__annotations__.keys()
-                    dataclass_values = [person[field] for field in dataclass_fields]
+                    dataclass_values = [
+                        intern(person[field]) if interned and person[field] is not None else person[field]
+                        for field, interned in zip(dataclass_fields, interned_fields)
+                    ]
                     dataclass_instance = movie_dataclass(*dataclass_values)
                     list_of_dataclasses.append(dataclass_instance)
-                log.info(f'SQLite: Извлечено {len(list_of_dataclasses)} записей из таблицы "{table}"')
-                yield list_of_dataclasses
+                self.__observe_memory(list_of_dataclasses)
+                extracted += len(list_of_dataclasses)
+                batches += 1
+                self.__log_batch(table, source, batches, len(list_of_dataclasses), extracted)
+                yield Batch(list_of_dataclasses, persons[-1]['source_rowid'])
                 list_of_dataclasses = []
             else:
                 break
+
+    def __select_from_table_to_tuples(
+        self,
+        table: str,
+        columns: str,
+        rowid_range: tuple = None,
+        after_rowid: int = None,
+    ):
+        source = self.__execute_select(table, columns, rowid_range, after_rowid)
+        extracted = batches = 0
+        while True:
+            rows = self.cursor.fetchmany(self.__fetch_size())
+            if not rows:
+                break
+            batch = Batch(list(map(without_rowid, rows)), rows[-1][0])
+            self.__observe_memory(batch.rows)
+            extracted += len(rows)
+            batches += 1
+            self.__log_batch(table, source, batches, len(rows), extracted)
+            yield batch
+
+    @staticmethod
+    def __log_batch(table: str, source: str, batch: int, rows: int, extracted: int) -> None:
+        log.info(
+            'SQLite: Извлечено %d записей из %s, всего %d', rows, source, extracted,
+            extra={'table': table, 'batch': batch, 'rows': rows},
+            stacklevel=2,
+        )
+
+    def __fetch_size(self) -> int:
+        fetch_size = self.controller.batch_size if self.controller else BATCH_SIZE
+        return self.memory_budget.cap(fetch_size) if self.memory_budget else fetch_size
+
+    def __observe_memory(self, rows: list) -> None:
+        if self.memory_budget:
+            self.memory_budget.observe(rows)
+
+    def __execute_select(self, table: str, columns: str, rowid_range: tuple = None, after_rowid: int = None) -> str:
+        conditions, params = [], []
+        source = f'"{table}"'
+        if rowid_range:
+            conditions.append('rowid BETWEEN ? AND ?')
+            params.extend(rowid_range)
+            source = f'"{table}" (rowid {rowid_range[0]}-{rowid_range[1]})'
+        if after_rowid is not None:
+            conditions.append('rowid > ?')
+            params.append(after_rowid)
+            log.info(f'SQLite: Извлечение из {source} продолжается после rowid {after_rowid}')
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        self.cursor.execute(
+            f'SELECT rowid AS source_rowid, {columns} FROM {sqlite_identifier(table)}{where} ORDER BY rowid;', params,
+        )
+        return source
+
+
+class PostgresExtractor:
+    def __init__(self, connection: postgres_connection, itersize: int = EXPORT_ITERSIZE):
+        self.conn = connection
+        self.itersize = itersize
+
+    @contextmanager
+    def snapshot(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(SNAPSHOT_TRANSACTION_QUERY)
+            cursor.execute(SET_UTC_TIME_ZONE_QUERY)
+        try:
+            yield self
+        finally:
+            self.conn.rollback()
+
+    def extract_table(self, table: str) -> Generator[Batch, None, None]:
+        with self.conn.cursor(name=f'export_{table}', cursor_factory=postgres_cursor) as cursor:
+            cursor.itersize = self.itersize
+            cursor.execute(EXPORT_QUERY[table])
+            yield from metrics.timed_batches(self.__fetch_batches(cursor, table), table, 'extract')
+
+    def __fetch_batches(self, cursor: postgres_cursor, table: str) -> Generator[Batch, None, None]:
+        extracted = 0
+        while rows := cursor.fetchmany(self.itersize):
+            extracted += len(rows)
+            yield Batch(rows, extracted)
+        log.info(f'Postgres: Извлечено {extracted} записей из "{table}"')
+
+
+class SQLiteSaver:
+    def __init__(self, connection: sqlite3.Connection):
+        self.conn = connection
+        self.cursor = self.conn.cursor()
+
+    def prepare(self) -> None:
+        self.cursor.execute('PRAGMA journal_mode = OFF')
+        self.cursor.execute('PRAGMA synchronous = OFF')
+        self.cursor.executescript(SQLITE_SCHEMA)
+
+    def save_table(self, data: Generator[Batch, None, None], table: str) -> None:
+        saved = 0
+        try:
+            for batch in data:
+                started = perf_counter()
+                self.cursor.executemany(SQLITE_INSERT_QUERY[table], batch.rows)
+                metrics.record(table, 'write', len(batch.rows), perf_counter() - started)
+                saved += len(batch.rows)
+            started = perf_counter()
+            self.conn.commit()
+            metrics.record(table, 'commit', saved, perf_counter() - started)
+        except DatabaseError as err:
+            metrics.record_error(table, 'write')
+            log.critical(f'Во время записи данных в SQLite произошла ошибка: {err}')
+            self.conn.rollback()
+            raise
+        log.info(f'SQLite: Сохранено {saved} записей в таблицу "{table}"')
+
+    def compact(self, file_name: str) -> None:
+        self.conn.commit()
+        self.cursor.execute('VACUUM INTO ?', (file_name,))
+        log.info(f'SQLite: Сжатый снимок записан в {file_name}')
@@ -0,0 +1,138 @@
+import json
+from bisect import bisect_left
+from collections import defaultdict
+from os import replace
+from threading import Lock
+from time import perf_counter
+from typing import Generator, Iterator
+
+from project_logger import log
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = 'migration'
+STAGES = ('extract', 'normalize', 'write', 'merge', 'commit')
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> Generator[tuple[str, int], None, None]:
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield str(bound), total
+
+
+class MigrationMetrics:
+    def __init__(self):
+        self.lock = Lock()
+        self.started = perf_counter()
+        self.rows = defaultdict(int)
+        self.batches = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.durations = defaultdict(Histogram)
+
+    def record(self, table: str, stage: str, rows: int, seconds: float) -> None:
+        with self.lock:
+            self.rows[table, stage] += rows
+            self.batches[table, stage] += 1
+            self.durations[table, stage].observe(seconds)
+
+    def record_error(self, table: str, stage: str) -> None:
+        with self.lock:
+            self.errors[table, stage] += 1
+
+    def record_retry(self, table: str, stage: str) -> None:
+        with self.lock:
+            self.retries[table, stage] += 1
+
+    def timed_batches(self, data: Iterator, table: str, stage: str) -> Generator:
+        data = iter(data)
+        while True:
+            started = perf_counter()
+            batch = next(data, None)
+            if batch is None:
+                return
+            self.record(table, stage, len(batch.rows), perf_counter() - started)
+            yield batch
+
+    def reset(self) -> None:
+        with self.lock:
+            self.started = perf_counter()
+            for values in (self.rows, self.batches, self.errors, self.retries, self.durations):
+                values.clear()
+
+    def prometheus_text(self) -> str:
+        with self.lock:
+            lines = []
+            for name, values, help_text in (
+                ('rows_total', self.rows, 'Обработано записей'),
+                ('batches_total', self.batches, 'Обработано пачек'),
+                ('errors_total', self.errors, 'Ошибок'),
+                ('retries_total', self.retries, 'Повторных попыток записи'),
+            ):
+                lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+                lines.append(f'# TYPE {METRIC_PREFIX}_{name} counter')
+                for (table, stage), value in sorted(values.items()):
+                    lines.append(f'{METRIC_PREFIX}_{name}{{table="{table}",stage="{stage}"}} {value}')
+            name = f'{METRIC_PREFIX}_stage_seconds'
+            lines.append(f'# HELP {name} Длительность обработки одной пачки')
+            lines.append(f'# TYPE {name} histogram')
+            for (table, stage), histogram in sorted(self.durations.items()):
+                labels = f'table="{table}",stage="{stage}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, file_name: str) -> None:
+        temporary_file = f'{file_name}.tmp'
+        with open(temporary_file, 'w') as file:
+            file.write(self.prometheus_text())
+        replace(temporary_file, file_name)
+
+    def summary(self) -> dict:
+        with self.lock:
+            tables = defaultdict(dict)
+            for (table, stage), histogram in self.durations.items():
+                rows = self.rows[table, stage]
+                tables[table][stage] = {
+                    'rows': rows,
+                    'batches': histogram.count,
+                    'seconds': round(histogram.sum, 6),
+                    'max_batch_seconds': round(histogram.max, 6),
+                    'rows_per_second': round(rows / histogram.sum, 1) if histogram.sum else None,
+                }
+            for (table, stage), errors in self.errors.items():
+                tables[table].setdefault(stage, {})['errors'] = errors
+            for (table, stage), retries in self.retries.items():
+                tables[table].setdefault(stage, {})['retries'] = retries
+            return {'elapsed_seconds': round(perf_counter() - self.started, 3), 'tables': dict(tables)}
+
+    def write_summary(self, file_name: str) -> None:
+        with open(file_name, 'w') as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=2)
+
+    def log_summary(self) -> None:
+        for table, stages in self.summary()['tables'].items():
+            report = ', '.join(
+                f'{stage} {stages[stage].get("rows", 0)} записей за {stages[stage].get("seconds", 0)} с'
+                for stage in STAGES if 'rows' in stages.get(stage, {})
+            )
+            log.info(f'Метрики: таблица "{table}": {report}')
+
+
+metrics = MigrationMetrics()
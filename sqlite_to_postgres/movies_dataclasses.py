@@ -1,37 +1,39 @@
 from dataclasses import dataclass, field
+from datetime import date
 from uuid import UUID, uuid4
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FilmWorkDataClass:
     title: str
     description: str
     type: str
     id: UUID = field(default_factory=uuid4)
     rating: float = field(default=0.0)
+    creation_date: date = field(default=None)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PersonDataClass:
     full_name: str
     id: UUID = field(default_factory=uuid4)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GenreDataClass:
     name: str
     description: str
     id: UUID = field(default_factory=uuid4)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GenreFilmWorkDataClass:
     genre_id: UUID
     film_work_id: UUID
     id: UUID = field(default_factory=uuid4)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PersonFilmWorkDataClass:
     person_id: UUID
     film_work_id: UUID
@@ -46,3 +48,20 @@ MOVIE_DATACLASS = {
     'genre_film_work': GenreFilmWorkDataClass,
     'person_film_work': PersonFilmWorkDataClass,
 }
+
+MOVIE_TIMESTAMPS = {
+    'person': ('created', 'modified'),
+    'film_work': ('created', 'modified'),
+    'genre': ('created', 'modified'),
+    'genre_film_work': ('created',),
+    'person_film_work': ('created',),
+}
+
+MOVIE_NATURAL_KEYS = {
+    'genre_film_work': ('film_work_id', 'genre_id'),
+    'person_film_work': ('person_id', 'film_work_id', 'role'),
+}
+
+INTERNED_FIELDS = ('type', 'role')
+FILM_TYPES = frozenset({'movie', 'tv_show'})
+PERSON_ROLES = frozenset({'actor', 'director', 'screenwriter', 'producer', 'operator', 'composer'})
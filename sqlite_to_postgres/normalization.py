@@ -0,0 +1,190 @@
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+from itertools import compress
+from math import nan
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Sequence
+
+from loaders import Batch
+from metrics import metrics
+from movies_dataclasses import FILM_TYPES, PERSON_ROLES
+from project_logger import log
+from quarantine import QuarantineStore
+from schema_mapping import MOVIE_MAPPING, TableMapping
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+UUID_PATTERN = '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+DATE_FORMAT = '%Y-%m-%d'
+DATE_PATTERN = r'^(?P<year>\d{4})[-/.](?P<month>\d{1,2})[-/.](?P<day>\d{1,2})(?:[ T].*)?$'
+DATE_COLUMNS = ('creation_date',)
+MIN_RATING = 0
+MAX_RATING = 10
+ENUM_VALUES = {'type': FILM_TYPES, 'role': PERSON_ROLES}
+ENUM_ALIASES = {'role': {'writer': 'screenwriter'}}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError('Для проверки записей по столбцам нужен пакет pyarrow')
+
+
+def _text_array(values: Sequence):
+    try:
+        return pa.array(values, pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+
+def _changes(original, normalized) -> tuple[list, int]:
+    changed = pc.sum(pc.cast(pc.not_equal(original, normalized), pa.int64())).as_py()
+    return (normalized.to_pylist(), changed) if changed else (None, 0)
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return nan
+
+
+def check_uuids(values: Sequence) -> tuple:
+    text = _text_array(values)
+    normalized = pc.utf8_lower(pc.utf8_trim_whitespace(text))
+    invalid = pc.fill_null(pc.invert(pc.match_substring_regex(normalized, UUID_PATTERN)), True)
+    return (*_changes(text, normalized), invalid)
+
+
+def check_enum(allowed: frozenset, aliases: dict[str, str], values: Sequence) -> tuple:
+    text = _text_array(values)
+    normalized = pc.utf8_lower(pc.utf8_trim_whitespace(text))
+    for alias, value in aliases.items():
+        normalized = pc.if_else(pc.equal(normalized, alias), value, normalized)
+    invalid = pc.invert(pc.is_in(normalized, value_set=pa.array(sorted(allowed), pa.string())))
+    return (*_changes(text, normalized), invalid)
+
+
+def check_ratings(values: Sequence) -> tuple:
+    normalized, changed = None, 0
+    try:
+        ratings = pa.array(values, pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        normalized = [None if value is None else _float(value) for value in values]
+        changed = sum(isinstance(value, str) for value in values)
+        ratings = pa.array(normalized, pa.float64())
+    in_range = pc.and_(pc.greater_equal(ratings, MIN_RATING), pc.less_equal(ratings, MAX_RATING))
+    return normalized, changed, pc.fill_null(pc.invert(in_range), False)
+
+
+def check_dates(values: Sequence) -> tuple:
+    text = _text_array(values)
+    parts = pc.extract_regex(pc.utf8_trim_whitespace(text), DATE_PATTERN)
+    normalized = pc.binary_join_element_wise(
+        pc.struct_field(parts, 'year'),
+        pc.utf8_lpad(pc.struct_field(parts, 'month'), 2, '0'),
+        pc.utf8_lpad(pc.struct_field(parts, 'day'), 2, '0'),
+        '-',
+    )
+    parsed = pc.strptime(normalized, format=DATE_FORMAT, unit='s', error_is_null=True)
+    valid = pc.fill_null(pc.equal(pc.strftime(parsed, format=DATE_FORMAT), normalized), False)
+    invalid = pc.and_(pc.invert(valid), pc.is_valid(text))
+    return (*_changes(text, normalized), invalid)
+
+
+def column_check(column: str) -> Callable[[Sequence], tuple]:
+    if column == 'id' or column.endswith('_id'):
+        return check_uuids
+    if column in ENUM_VALUES:
+        return partial(check_enum, ENUM_VALUES[column], ENUM_ALIASES.get(column, {}))
+    if column == 'rating':
+        return check_ratings
+    if column in DATE_COLUMNS:
+        return check_dates
+    return None
+
+
+class BatchNormalizer:
+    def __init__(self, quarantine: QuarantineStore):
+        _require_pyarrow()
+        self.quarantine = quarantine
+        self.lock = Lock()
+        self.rejected = Counter()
+        self.normalized = Counter()
+        self.samples = {}
+
+    def transform(self, table: str, mapping: dict[str, TableMapping] = None) -> Callable[[Batch], Batch]:
+        columns = (mapping or MOVIE_MAPPING)[table].columns
+        checks = {position: column_check(column) for position, column in enumerate(columns)}
+        checks = {position: check for position, check in checks.items() if check}
+        return partial(self.normalize, table, tuple(columns), checks)
+
+    def normalize(self, table: str, columns: tuple, checks: dict[int, Callable], batch: Batch) -> Batch:
+        if not batch.rows:
+            return batch
+        started = perf_counter()
+        values = list(zip(*batch.rows))
+        invalid_columns = {}
+        changed = False
+        for position, check in checks.items():
+            normalized, normalized_count, invalid = check(values[position])
+            if normalized is not None:
+                values[position] = normalized
+                changed = True
+                with self.lock:
+                    self.normalized[table, columns[position]] += normalized_count
+            if pc.any(invalid).as_py():
+                invalid_columns[position] = invalid
+        if invalid_columns:
+            rows = self._reject(table, columns, batch.rows, values, invalid_columns)
+        elif changed:
+            rows = list(zip(*values))
+        else:
+            rows = batch.rows
+        metrics.record(table, 'normalize', len(batch.rows), perf_counter() - started)
+        return Batch(rows, batch.last_rowid)
+
+    def _reject(self, table: str, columns: tuple, source_rows: list, values: list, invalid_columns: dict) -> list:
+        invalid_rows = None
+        for position, invalid in invalid_columns.items():
+            invalid_rows = invalid if invalid_rows is None else pc.or_(invalid_rows, invalid)
+            rejected = pc.indices_nonzero(invalid)
+            with self.lock:
+                self.rejected[table, columns[position]] += len(rejected)
+                self.samples.setdefault((table, columns[position]), source_rows[rejected[0].as_py()][position])
+        for row_position in pc.indices_nonzero(invalid_rows).to_pylist():
+            reasons = ', '.join(
+                columns[position] for position, invalid in invalid_columns.items() if invalid[row_position].as_py()
+            )
+            self.quarantine.add(table, source_rows[row_position], f'недопустимые значения: {reasons}')
+        return list(compress(zip(*values), pc.invert(invalid_rows).to_pylist()))
+
+    def log_report(self) -> None:
+        for (table, column), count in sorted(self.normalized.items()):
+            log.info(f'Проверка: Таблица "{table}", столбец "{column}": исправлено {count} значений')
+        for (table, column), count in sorted(self.rejected.items()):
+            log.warning(
+                f'Проверка: Таблица "{table}", столбец "{column}": отклонено {count} записей, '
+                f'например {self.samples[table, column]!r}'
+            )
+        if not self.rejected:
+            log.info('Проверка: недопустимых значений не найдено')
+
+
+@contextmanager
+def batch_normalizer(enabled: bool, quarantine: QuarantineStore = None):
+    if not enabled:
+        yield None
+        return
+    if quarantine is None:
+        raise ValueError('Отклонённые проверкой записи сохраняются только в карантин, нужен --quarantine-file')
+    normalizer = BatchNormalizer(quarantine)
+    try:
+        yield normalizer
+    finally:
+        normalizer.log_report()
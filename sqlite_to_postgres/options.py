@@ -0,0 +1,42 @@
+from argparse import Namespace
+from dataclasses import dataclass, fields
+
+from batching import AdaptiveBatchController, MemoryBudget
+
+
+@dataclass
+class LoadOptions:
+    mode: str = 'insert'
+    workers: int = 1
+    shards: int = 1
+    resume: bool = False
+    delta: bool = False
+    delete_missing: bool = False
+    validate: bool = False
+    queue_depth: int = 0
+    adaptive: bool = False
+    target_commit_seconds: float = 0.5
+    commit_byte_budget: int = None
+    defer_indexes: bool = False
+    staging_dir: str = None
+    memory_limit: int = None
+    use_async: bool = False
+    prepare: bool = True
+    quarantine_file: str = None
+    introspect: bool = False
+    normalize: bool = False
+
+    @classmethod
+    def from_args(cls, args: Namespace) -> 'LoadOptions':
+        return cls(**{option.name: getattr(args, option.name) for option in fields(cls)})
+
+    def batch_controller(self, table: str) -> AdaptiveBatchController:
+        if not self.adaptive:
+            return None
+        return AdaptiveBatchController(table, self.target_commit_seconds, self.commit_byte_budget)
+
+    def memory_budget(self, table: str) -> MemoryBudget:
+        if not self.memory_limit:
+            return None
+        batches_in_flight = (self.queue_depth + 2) * max(self.workers, 1)
+        return MemoryBudget(table, self.memory_limit // batches_in_flight)
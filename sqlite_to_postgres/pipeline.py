@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from typing import Callable, Generator, Iterator
+
+from loaders import Batch
+from project_logger import log
+
+QUEUE_TIMEOUT = 0.1
+
+
+@dataclass
+class StageStats:
+    name: str
+    busy: float = 0.0
+    blocked: float = 0.0
+    batches: int = 0
+
+
+@dataclass
+class StageFailure:
+    error: BaseException
+
+
+class PipelineFinished:
+    pass
+
+
+class PipelinedRunner:
+    def __init__(self, queue_depth: int = 4, transform: Callable[[Batch], Batch] = None):
+        self.queue_depth = queue_depth
+        self.transform = transform
+        self.stats: list[StageStats] = []
+
+    def run(
+        self,
+        data: Iterator[Batch],
+        table: str,
+        transform: Callable[[Batch], Batch] = None,
+    ) -> Generator[Batch, None, None]:
+        transform = transform or self.transform
+        stop = Event()
+        reader = StageStats('чтение SQLite')
+        writer = StageStats('запись PostgreSQL')
+        self.stats = [reader]
+        source_queue = output_queue = Queue(maxsize=self.queue_depth)
+        threads = [Thread(target=self._read, args=(iter(data), source_queue, stop, reader), daemon=True)]
+        if transform:
+            transformer = StageStats('преобразование')
+            self.stats.append(transformer)
+            output_queue = Queue(maxsize=self.queue_depth)
+            threads.append(Thread(
+                target=self._transform,
+                args=(source_queue, output_queue, stop, transformer, transform),
+                daemon=True,
+            ))
+        self.stats.append(writer)
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            yield from self._consume(output_queue, writer)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self._report(table, perf_counter() - started)
+
+    def _read(self, data: Iterator[Batch], output: Queue, stop: Event, stats: StageStats) -> None:
+        try:
+            while not stop.is_set():
+                started = perf_counter()
+                batch = next(data, None)
+                stats.busy += perf_counter() - started
+                if batch is None:
+                    break
+                stats.batches += 1
+                self._put(output, batch, stop, stats)
+            self._put(output, PipelineFinished(), stop, stats)
+        except BaseException as err:
+            self._put(output, StageFailure(err), stop, stats)
+
+    def _transform(
+        self,
+        source: Queue,
+        output: Queue,
+        stop: Event,
+        stats: StageStats,
+        transform: Callable[[Batch], Batch],
+    ) -> None:
+        try:
+            while not stop.is_set():
+                item = self._get(source, stop, stats)
+                if not isinstance(item, Batch):
+                    self._put(output, item, stop, stats)
+                    return
+                started = perf_counter()
+                item = transform(item)
+                stats.busy += perf_counter() - started
+                stats.batches += 1
+                self._put(output, item, stop, stats)
+        except BaseException as err:
+            self._put(output, StageFailure(err), stop, stats)
+
+    def _consume(self, source: Queue, stats: StageStats) -> Generator[Batch, None, None]:
+        while True:
+            started = perf_counter()
+            item = source.get()
+            stats.blocked += perf_counter() - started
+            if isinstance(item, PipelineFinished):
+                return
+            if isinstance(item, StageFailure):
+                raise item.error
+            stats.batches += 1
+            started = perf_counter()
+            yield item
+            stats.busy += perf_counter() - started
+
+    @staticmethod
+    def _put(output: Queue, item, stop: Event, stats: StageStats) -> None:
+        started = perf_counter()
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=QUEUE_TIMEOUT)
+                break
+            except Full:
+                continue
+        stats.blocked += perf_counter() - started
+
+    @staticmethod
+    def _get(source: Queue, stop: Event, stats: StageStats):
+        started = perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=QUEUE_TIMEOUT)
+                except Empty:
+                    continue
+            return PipelineFinished()
+        finally:
+            stats.blocked += perf_counter() - started
+
+    def _report(self, table: str, elapsed: float) -> None:
+        elapsed = max(elapsed, 1e-9)
+        utilisation = ', '.join(
+            f'{stats.name}: занято {stats.busy / elapsed:.0%}, ожидание {stats.blocked / elapsed:.0%}'
+            for stats in self.stats
+        )
+        log.info(f'Конвейер: Таблица "{table}" за {elapsed:.2f} с ({utilisation})')
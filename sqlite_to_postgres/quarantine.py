@@ -0,0 +1,31 @@
+import json
+from collections import Counter
+from threading import Lock
+
+from project_logger import log
+
+
+class QuarantineStore:
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.lock = Lock()
+        self.counts = Counter()
+        self.file = open(file_name, 'a', encoding='utf-8')
+
+    def add(self, table: str, row: tuple, reason: str) -> None:
+        entry = json.dumps({'table': table, 'row': list(row), 'reason': reason}, ensure_ascii=False, default=str)
+        with self.lock:
+            self.file.write(entry + '\n')
+            self.counts[table] += 1
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+        for table, count in self.counts.items():
+            log.warning(f'Карантин: {count} записей таблицы "{table}" записаны в {self.file_name}')
+
+    def __enter__(self) -> 'QuarantineStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
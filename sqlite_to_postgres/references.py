@@ -0,0 +1,151 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from heapq import merge
+from itertools import groupby
+from threading import Lock
+from typing import Generator
+from uuid import UUID
+
+from loaders import Batch, as_tuples
+from project_logger import log
+from psycopg2 import sql
+from psycopg2.extensions import connection as postgres_connection
+from psycopg2.extensions import cursor as postgres_cursor
+from quarantine import QuarantineStore
+from schema_mapping import MOVIE_MAPPING, TableMapping
+from sql_queries import SELECT_IDS_QUERY
+
+ID_SIZE = 16
+SEED_ITERSIZE = 10000
+
+
+def id_bytes(value) -> bytes:
+    if isinstance(value, UUID):
+        return value.bytes
+    try:
+        return UUID(str(value)).bytes
+    except ValueError:
+        return None
+
+
+def foreign_keys(columns: tuple, tables: dict) -> dict[int, str]:
+    return {
+        position: column[:-len('_id')]
+        for position, column in enumerate(columns)
+        if column.endswith('_id') and column[:-len('_id')] in tables
+    }
+
+
+class SortedIds:
+    def __init__(self, keys: bytes):
+        self.keys = keys
+
+    def __len__(self) -> int:
+        return len(self.keys) // ID_SIZE
+
+    def __getitem__(self, position: int) -> bytes:
+        return self.keys[position * ID_SIZE:(position + 1) * ID_SIZE]
+
+    def __iter__(self):
+        return (self.keys[start:start + ID_SIZE] for start in range(0, len(self.keys), ID_SIZE))
+
+    def __contains__(self, key: bytes) -> bool:
+        position = bisect_left(self, key)
+        return position < len(self) and self[position] == key
+
+
+def merge_runs(*runs) -> SortedIds:
+    return SortedIds(b''.join(key for key, _ in groupby(merge(*runs))))
+
+
+class IdIndex:
+    def __init__(self):
+        self.lock = Lock()
+        self.pending: list[bytes] = []
+        self.runs: list[SortedIds] = []
+
+    def add(self, values) -> None:
+        keys = [key for key in map(id_bytes, values) if key is not None]
+        with self.lock:
+            self.pending.extend(keys)
+
+    def __contains__(self, value) -> bool:
+        if self.pending:
+            self._freeze()
+        key = id_bytes(value)
+        if key is None:
+            return False
+        return any(key in run for run in self.runs)
+
+    def __len__(self) -> int:
+        return sum(map(len, self.runs)) + len(self.pending)
+
+    def _freeze(self) -> None:
+        with self.lock:
+            if not self.pending:
+                return
+            run = merge_runs(sorted(self.pending))
+            self.pending = []
+            runs = list(self.runs)
+            while runs and len(runs[-1]) <= len(run):
+                run = merge_runs(runs.pop(), run)
+            runs.append(run)
+            self.runs = runs
+
+
+class ReferenceGuard:
+    def __init__(self, quarantine: QuarantineStore, mapping: dict[str, TableMapping] = None):
+        self.quarantine = quarantine
+        self.mapping = mapping or MOVIE_MAPPING
+        self.references = {
+            table: foreign_keys(table_mapping.columns, self.mapping) for table, table_mapping in self.mapping.items()
+        }
+        self.indexes = {parent: IdIndex() for references in self.references.values() for parent in references.values()}
+
+    def reference_order(self, graph: dict[str, set[str]]) -> dict[str, set[str]]:
+        return {table: dependencies | set(self.references[table].values()) for table, dependencies in graph.items()}
+
+    def seed(self, connection: postgres_connection) -> None:
+        for table, index in self.indexes.items():
+            with connection.cursor(name=f'reference_ids_{table}', cursor_factory=postgres_cursor) as cursor:
+                cursor.itersize = SEED_ITERSIZE
+                cursor.execute(sql.SQL(SELECT_IDS_QUERY).format(table=self.mapping[table].target))
+                index.add(row[0] for row in cursor)
+            log.info(f'Ссылки: Из PostgreSQL загружено {len(index)} идентификаторов таблицы "{table}"')
+
+    def check(self, data: Generator[Batch, None, None], table: str) -> Generator[Batch, None, None]:
+        if self.references[table]:
+            return self._filter(data, table)
+        return data
+
+    def on_written(self, table: str, rows: list) -> None:
+        if table in self.indexes:
+            id_position = self.mapping[table].columns.index('id')
+            self.indexes[table].add(row[id_position] for row in rows)
+
+    def _filter(self, data: Generator[Batch, None, None], table: str) -> Generator[Batch, None, None]:
+        references = [(position, self.indexes[parent]) for position, parent in self.references[table].items()]
+        orphans = 0
+        for batch in data:
+            valid = []
+            for row, values in zip(batch.rows, as_tuples(batch.rows)):
+                missing = [position for position, index in references if values[position] not in index]
+                if missing:
+                    self.quarantine.add(table, values, ', '.join(
+                        f'нет записи {self.references[table][position]} {values[position]}' for position in missing
+                    ))
+                    orphans += 1
+                else:
+                    valid.append(row)
+            yield Batch(valid, batch.last_rowid)
+        if orphans:
+            log.warning(f'Ссылки: В таблице "{table}" {orphans} записей ссылаются на отсутствующие записи')
+
+
+@contextmanager
+def reference_guard(quarantine_file: str = None, mapping: dict[str, TableMapping] = None):
+    if not quarantine_file:
+        yield None
+        return
+    with QuarantineStore(quarantine_file) as quarantine:
+        yield ReferenceGuard(quarantine, mapping)
@@ -0,0 +1,149 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from batching import AdaptiveBatchController, MemoryBudget
+from checkpoints import CheckpointJournal
+from context_managers import open_postgresql_pool, open_sqlite_db
+from loaders import PostgresSaver, SQLiteExtractor
+from movies_dataclasses import MOVIE_DATACLASS
+from normalization import batch_normalizer
+from options import LoadOptions
+from pipeline import PipelinedRunner
+from project_logger import log
+from psycopg2.extensions import connection as postgres_connection
+from references import reference_guard
+from schema_mapping import MOVIE_MAPPING, introspect_mapping
+from sql_queries import FOREIGN_KEYS_QUERY
+from staging import ArrowExtractor
+
+
+def build_dependency_graph(connection: postgres_connection, tables=MOVIE_DATACLASS.keys()) -> dict[str, set[str]]:
+    graph = {table: set() for table in tables}
+    with connection.cursor() as cursor:
+        cursor.execute(FOREIGN_KEYS_QUERY)
+        for table, referenced_table in cursor.fetchall():
+            if table in graph and referenced_table in graph and referenced_table != table:
+                graph[table].add(referenced_table)
+    connection.commit()
+    return graph
+
+
+class TableScheduler:
+    def __init__(self, sqlite_db: str, dsl: dict, options: LoadOptions):
+        self.sqlite_db = sqlite_db
+        self.dsl = dsl
+        self.options = options
+
+    def run(self) -> None:
+        with open_postgresql_pool(self.dsl, self.options.workers) as pool:
+            self.pool = pool
+            graph = self._prepare()
+            with (
+                reference_guard(self.options.quarantine_file, self.mapping) as guard,
+                batch_normalizer(self.options.normalize, guard.quarantine if guard else None) as normalizer,
+            ):
+                self.guard = guard
+                self.normalizer = normalizer
+                if guard:
+                    connection = pool.getconn()
+                    try:
+                        guard.seed(connection)
+                    finally:
+                        pool.putconn(connection)
+                    graph = guard.reference_order(graph)
+                log.info(f'Планировщик: Порядок зависимостей таблиц {graph}')
+                self._run_graph(graph, self._split_into_shards(graph))
+
+    def _prepare(self) -> dict[str, set[str]]:
+        connection = self.pool.getconn()
+        try:
+            self.mapping = self._introspect(connection) if self.options.introspect else MOVIE_MAPPING
+            self.journal = CheckpointJournal(connection)
+            self.journal.prepare(self.options.resume)
+            return build_dependency_graph(connection, self.mapping.keys())
+        finally:
+            self.pool.putconn(connection)
+
+    def _introspect(self, connection: postgres_connection) -> dict:
+        with open_sqlite_db(self.sqlite_db, read_only=True) as sqlite_conn:
+            return introspect_mapping(sqlite_conn, connection)
+
+    def _split_into_shards(self, graph: dict[str, set[str]]) -> dict[str, list]:
+        if self.options.shards <= 1:
+            return {table: [None] for table in graph}
+        with self._open_extractor() as extractor:
+            return {table: extractor.shard_bounds(table, self.options.shards) for table in graph}
+
+    def _run_graph(self, graph: dict[str, set[str]], shards: dict[str, list]) -> None:
+        self.pending = dict(graph)
+        self.done = set()
+        self.remaining = {table: len(shards[table]) for table in graph}
+        self.running: dict[Future, tuple] = {}
+        with ThreadPoolExecutor(max_workers=self.options.workers) as executor:
+            while self.pending or self.running:
+                self._submit_ready_tables(executor, shards)
+                if not self.running:
+                    if self.pending:
+                        raise RuntimeError(f'Циклическая зависимость между таблицами: {sorted(self.pending)}')
+                    break
+                finished, _ = wait(self.running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self._complete_shard(future)
+
+    def _submit_ready_tables(self, executor: ThreadPoolExecutor, shards: dict[str, list]) -> None:
+        for table in [table for table, depends_on in self.pending.items() if depends_on <= self.done]:
+            del self.pending[table]
+            if not shards[table]:
+                self.done.add(table)
+            for rowid_range in shards[table]:
+                self.running[executor.submit(self._load_shard, table, rowid_range)] = (table, rowid_range)
+
+    def _complete_shard(self, future: Future) -> None:
+        table, rowid_range = self.running.pop(future)
+        if future.exception() is not None:
+            for other in self.running:
+                other.cancel()
+            raise future.exception()
+        self.remaining[table] -= 1
+        if rowid_range:
+            log.info(f'Планировщик: Перенесены строки {rowid_range[0]}-{rowid_range[1]} '
+                     f'таблицы "{table}", осталось частей {self.remaining[table]}')
+        if not self.remaining[table]:
+            self.done.add(table)
+            log.info(f'Планировщик: Таблица "{table}" перенесена')
+
+    def _load_shard(self, table: str, rowid_range: tuple[int, int] = None) -> None:
+        pg_conn = self.pool.getconn()
+        try:
+            shard_start = rowid_range[0] if rowid_range else 0
+            controller = self.options.batch_controller(table)
+            with self._open_extractor(controller, self.options.memory_budget(table)) as extractor:
+                data = extractor.extract_table(table, rowid_range, self.journal.last_rowid(table, shard_start))
+                transform = self.normalizer.transform(table, self.mapping) if self.normalizer else None
+                if self.options.queue_depth:
+                    data = PipelinedRunner(self.options.queue_depth).run(data, table, transform)
+                elif transform:
+                    data = map(transform, data)
+                if self.guard:
+                    data = self.guard.check(data, table)
+                postgres_saver = PostgresSaver(
+                    pg_conn,
+                    self.options.mode,
+                    self.journal,
+                    controller=controller,
+                    prepare=self.options.prepare,
+                    dead_letters=self.guard.quarantine if self.guard else None,
+                    mapping=self.mapping,
+                    on_written=self.guard.on_written if self.guard else None,
+                )
+                postgres_saver.save_table(data, table, shard_start)
+        finally:
+            self.pool.putconn(pg_conn)
+
+    @contextmanager
+    def _open_extractor(self, controller: AdaptiveBatchController = None, memory_budget: MemoryBudget = None):
+        if self.options.staging_dir:
+            yield ArrowExtractor(self.options.staging_dir, controller, memory_budget)
+            return
+        with open_sqlite_db(self.sqlite_db, read_only=True) as sqlite_conn:
+            yield SQLiteExtractor(sqlite_conn, self.options.validate, controller, memory_budget, self.mapping)
@@ -0,0 +1,201 @@
+import re
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from graphlib import TopologicalSorter
+from operator import itemgetter
+from uuid import UUID
+
+from context_managers import open_postgresql_db, open_sqlite_db
+from movies_dataclasses import MOVIE_DATACLASS, MOVIE_NATURAL_KEYS, MOVIE_TIMESTAMPS
+from project_logger import log
+from psycopg2 import sql
+from psycopg2.extensions import connection as postgres_connection
+from sql_queries import (
+    COPY_QUERY,
+    CREATE_STAGING_TABLE_QUERY,
+    DO_NOTHING_ACTION,
+    DO_UPDATE_ACTION,
+    FOREIGN_KEYS_QUERY,
+    INSERT_QUERY,
+    MERGE_QUERY,
+    NATURAL_KEYS_QUERY,
+    PRIMARY_KEYS_QUERY,
+    SQLITE_COLUMNS_QUERY,
+    SQLITE_TABLES_QUERY,
+    TARGET_COLUMNS_QUERY
+)
+
+SCHEMA = 'content'
+TIMESTAMP_COLUMNS = ('created', 'modified')
+PARAMETER_TYPES = {UUID: 'uuid', str: 'text', float: 'float8', date: 'date'}
+DATE_FORMAT = '%Y-%m-%d'
+DATE_TIME_SEPARATOR = re.compile('[ T]')
+
+without_rowid = itemgetter(slice(1, None))
+
+
+def sqlite_identifier(name: str) -> str:
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def identifiers(names: tuple) -> sql.Composed:
+    return sql.SQL(', ').join(map(sql.Identifier, names))
+
+
+def source_date(value) -> date:
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.strptime(DATE_TIME_SEPARATOR.split(value.strip(), 1)[0], DATE_FORMAT).date()
+    except ValueError:
+        return value
+
+
+@dataclass(frozen=True)
+class TableMapping:
+    table: str
+    columns: tuple
+    parameter_types: tuple
+    key: tuple = ('id',)
+    timestamps: tuple = ()
+    natural_key: tuple = ()
+
+    @property
+    def select_columns(self) -> str:
+        return ', '.join(map(sqlite_identifier, self.columns))
+
+    @property
+    def target(self) -> sql.Identifier:
+        return sql.Identifier(SCHEMA, self.table)
+
+    @property
+    def staging(self) -> sql.Identifier:
+        return sql.Identifier(f'staging_{self.table}')
+
+    def insert_query(self, upsert: bool = False, numbered: bool = False) -> sql.Composed:
+        if numbered:
+            values = [sql.SQL(f'${position}') for position in range(1, len(self.columns) + 1)]
+        else:
+            values = [sql.Placeholder()] * len(self.columns)
+        return self._format(INSERT_QUERY, values, upsert)
+
+    def merge_query(self, upsert: bool = False) -> sql.Composed:
+        return self._format(MERGE_QUERY, list(map(sql.Identifier, self.columns)), upsert)
+
+    def copy_query(self) -> sql.Composed:
+        return sql.SQL(COPY_QUERY).format(staging=self.staging, columns=identifiers(self.columns))
+
+    def create_staging_query(self) -> sql.Composed:
+        return sql.SQL(CREATE_STAGING_TABLE_QUERY).format(staging=self.staging, table=self.target)
+
+    def conflict_key(self, upsert: bool) -> tuple:
+        return self.natural_key if upsert and self.natural_key else self.key
+
+    def conflict_action(self, upsert: bool) -> sql.Composable:
+        updates = [
+            sql.SQL('{column} = EXCLUDED.{column}').format(column=sql.Identifier(column))
+            for column in self.columns if column not in self.conflict_key(upsert)
+        ]
+        updates += [
+            sql.SQL('{column} = NOW()').format(column=sql.Identifier(column))
+            for column in self.timestamps if column != 'created'
+        ]
+        if not upsert or not updates:
+            return sql.SQL(DO_NOTHING_ACTION)
+        return sql.SQL(DO_UPDATE_ACTION).format(updates=sql.SQL(', ').join(updates))
+
+    def _format(self, query: str, values: list, upsert: bool) -> sql.Composed:
+        return sql.SQL(query).format(
+            table=self.target,
+            staging=self.staging,
+            columns=identifiers(self.columns + self.timestamps),
+            values=sql.SQL(', ').join([*values, *[sql.SQL('NOW()')] * len(self.timestamps)]),
+            key=identifiers(self.conflict_key(upsert)),
+            action=self.conflict_action(upsert),
+        )
+
+
+def dataclass_mapping() -> dict[str, TableMapping]:
+    return {
+        table: TableMapping(
+            table=table,
+            columns=tuple(field.name for field in fields(movie_dataclass)),
+            parameter_types=tuple(PARAMETER_TYPES[field.type] for field in fields(movie_dataclass)),
+            timestamps=MOVIE_TIMESTAMPS[table],
+            natural_key=MOVIE_NATURAL_KEYS.get(table, ()),
+        )
+        for table, movie_dataclass in MOVIE_DATACLASS.items()
+    }
+
+
+MOVIE_MAPPING = dataclass_mapping()
+
+
+def introspect_mapping(
+    sqlite_connection: sqlite3.Connection,
+    pg_connection: postgres_connection,
+) -> dict[str, TableMapping]:
+    source = source_columns(sqlite_connection)
+    target, keys, natural_keys, graph = target_schema(pg_connection)
+    tables = sorted((table for table in target if table in source and keys[table]), key=table_position)
+    sorter = TopologicalSorter({table: graph[table] & set(tables) for table in tables})
+    mapping = {}
+    for table in sorter.static_order():
+        mapped = [(column, data_type) for column, data_type in target[table] if column in source[table]]
+        mapped_columns = {column for column, _ in mapped}
+        mapping[table] = TableMapping(
+            table=table,
+            columns=tuple(column for column, _ in mapped),
+            parameter_types=tuple(data_type for _, data_type in mapped),
+            key=tuple(keys[table]),
+            timestamps=tuple(
+                column for column, _ in target[table] if column in TIMESTAMP_COLUMNS and column not in source[table]
+            ),
+            natural_key=next(
+                (tuple(columns) for columns in natural_keys[table].values() if set(columns) <= mapped_columns), (),
+            ),
+        )
+        log.info(f'Схема: Таблица "{table}" переносится по столбцам {", ".join(mapping[table].columns)}')
+    return mapping
+
+
+def active_mapping(sqlite_db: str, dsl: dict, introspect: bool = False) -> dict[str, TableMapping]:
+    if not introspect:
+        return MOVIE_MAPPING
+    with open_sqlite_db(sqlite_db, read_only=True) as sqlite_conn, open_postgresql_db(dsl) as pg_conn:
+        return introspect_mapping(sqlite_conn, pg_conn)
+
+
+def table_position(table: str) -> int:
+    known_tables = list(MOVIE_DATACLASS)
+    return known_tables.index(table) if table in known_tables else len(known_tables)
+
+
+def source_columns(connection: sqlite3.Connection) -> dict[str, set[str]]:
+    return {
+        table: {column for column, in connection.execute(SQLITE_COLUMNS_QUERY, (table,))}
+        for table, in connection.execute(SQLITE_TABLES_QUERY).fetchall()
+    }
+
+
+def target_schema(connection: postgres_connection) -> tuple[dict, dict, dict, dict]:
+    target, keys, graph = defaultdict(list), defaultdict(list), defaultdict(set)
+    natural_keys = defaultdict(lambda: defaultdict(list))
+    with connection.cursor() as cursor:
+        cursor.execute(TARGET_COLUMNS_QUERY)
+        for table, column, data_type in cursor.fetchall():
+            target[table].append((column, data_type))
+        cursor.execute(PRIMARY_KEYS_QUERY)
+        for table, column in cursor.fetchall():
+            keys[table].append(column)
+        cursor.execute(NATURAL_KEYS_QUERY)
+        for table, index, column in cursor.fetchall():
+            natural_keys[table][index].append(column)
+        cursor.execute(FOREIGN_KEYS_QUERY)
+        for table, referenced_table in cursor.fetchall():
+            if referenced_table != table:
+                graph[table].add(referenced_table)
+    connection.commit()
+    return target, keys, natural_keys, graph
@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from context_managers import open_postgresql_db
+from project_logger import log
+from sql_queries import REFRESH_SEARCH_PROJECTION_QUERY, SEARCH_PROJECTION_EXISTS_QUERY, SELECT_NOW_QUERY
+
+
+class SearchProjection:
+    def __init__(self, dsl: dict):
+        self.dsl = dsl
+
+    def started(self) -> datetime:
+        with open_postgresql_db(self.dsl) as pg_conn, pg_conn.cursor() as cursor:
+            cursor.execute(SELECT_NOW_QUERY)
+            return cursor.fetchone()[0]
+
+    def refresh(self, since: datetime = None) -> None:
+        with open_postgresql_db(self.dsl) as pg_conn, pg_conn.cursor() as cursor:
+            cursor.execute(SEARCH_PROJECTION_EXISTS_QUERY)
+            if cursor.fetchone()[0] is None:
+                log.warning('Поиск: Функция content.refresh_film_work_search не найдена, обновление пропущено')
+                return
+            cursor.execute(REFRESH_SEARCH_PROJECTION_QUERY, (since,))
+            refreshed = cursor.fetchone()[0]
+        scope = 'полностью' if since is None else f'с {since:%Y-%m-%d %H:%M:%S}'
+        log.info(f'Поиск: Обновлено {refreshed} записей content.film_work_search ({scope})')
+
+
+@contextmanager
+def refreshed_search_projection(dsl: dict, full: bool = False):
+    projection = SearchProjection(dsl)
+    since = None if full else projection.started()
+    yield projection
+    projection.refresh(since)
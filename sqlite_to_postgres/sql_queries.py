@@ -1,12 +1,221 @@
-INSERT_QUERY = {
-    'film_work': '''INSERT INTO content.film_work (title, description, type, id, rating, created, modified)
-                    VALUES (%s, %s, %s, %s, %s, NOW(), NOW()) ON CONFLICT (id) DO NOTHING''',
-    'person': '''INSERT INTO content.person (full_name, id, created, modified)
-                 VALUES (%s, %s, NOW(), NOW()) ON CONFLICT (id) DO NOTHING''',
-    'genre': '''INSERT INTO content.genre (name, description, id, created, modified)
-                VALUES (%s, %s, %s, NOW(), NOW()) ON CONFLICT (id) DO NOTHING''',
-    'genre_film_work': '''INSERT INTO content.genre_film_work (genre_id, film_work_id, id, created)
-                          VALUES (%s, %s, %s, NOW()) ON CONFLICT (id) DO NOTHING''',
-    'person_film_work': '''INSERT INTO content.person_film_work (person_id, film_work_id, role, id, created)
-                           VALUES (%s, %s, %s, %s, NOW()) ON CONFLICT (id) DO NOTHING'''
+CREATE_STAGING_TABLE_QUERY = '''CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)
+                                ON COMMIT DROP'''
+
+FOREIGN_KEYS_QUERY = '''SELECT DISTINCT source.relname, target.relname
+                        FROM pg_constraint AS constraint_
+                        JOIN pg_class AS source ON source.oid = constraint_.conrelid
+                        JOIN pg_class AS target ON target.oid = constraint_.confrelid
+                        JOIN pg_namespace AS namespace ON namespace.oid = source.relnamespace
+                        WHERE constraint_.contype = 'f' AND namespace.nspname = 'content' '''
+
+CREATE_CHECKPOINT_TABLE_QUERY = '''CREATE TABLE IF NOT EXISTS public.migration_checkpoint (
+                                       table_name TEXT NOT NULL,
+                                       shard_start BIGINT NOT NULL,
+                                       last_rowid BIGINT NOT NULL,
+                                       batches INTEGER NOT NULL,
+                                       updated timestamp with time zone,
+                                       PRIMARY KEY (table_name, shard_start)
+                                   )'''
+
+SELECT_CHECKPOINTS_QUERY = 'SELECT table_name, shard_start, last_rowid FROM public.migration_checkpoint'
+
+CLEAR_CHECKPOINTS_QUERY = 'TRUNCATE public.migration_checkpoint'
+
+SAVE_CHECKPOINT_QUERY = '''INSERT INTO public.migration_checkpoint
+                               (table_name, shard_start, last_rowid, batches, updated)
+                           VALUES (%s, %s, %s, 1, NOW())
+                           ON CONFLICT (table_name, shard_start) DO UPDATE
+                           SET last_rowid = EXCLUDED.last_rowid,
+                               batches = migration_checkpoint.batches + 1,
+                               updated = NOW()'''
+
+SELECT_FINGERPRINT_QUERY = 'SELECT {columns} FROM {table} WHERE id = ANY(%s::uuid[])'
+
+DELETE_IDS_QUERY = 'DELETE FROM {table} WHERE id = ANY(%s::uuid[])'
+
+CREATE_SEEN_IDS_QUERY = 'CREATE TEMP TABLE IF NOT EXISTS {seen} (id uuid PRIMARY KEY)'
+
+INSERT_SEEN_IDS_QUERY = 'INSERT INTO {seen} SELECT unnest(%s::uuid[]) ON CONFLICT DO NOTHING'
+
+DELETE_MISSING_QUERY = '''DELETE FROM {table} AS target
+                          WHERE NOT EXISTS (SELECT 1 FROM {seen} AS seen WHERE seen.id = target.id)'''
+
+TRUNCATE_CONTENT_QUERY = '''TRUNCATE content.person_film_work, content.genre_film_work,
+                                     content.person, content.film_work, content.genre CASCADE'''
+
+SECONDARY_INDEXES_QUERY = '''SELECT table_.relname, index_.relname, pg_get_indexdef(index_.oid)
+                             FROM pg_index AS pg_index_
+                             JOIN pg_class AS index_ ON index_.oid = pg_index_.indexrelid
+                             JOIN pg_class AS table_ ON table_.oid = pg_index_.indrelid
+                             JOIN pg_namespace AS namespace ON namespace.oid = table_.relnamespace
+                             WHERE namespace.nspname = 'content'
+                               AND table_.relname = ANY(%s)
+                               AND NOT pg_index_.indisprimary
+                               AND NOT EXISTS (
+                                   SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = index_.oid
+                               )'''
+
+FOREIGN_KEY_DEFINITIONS_QUERY = '''SELECT table_.relname, constraint_.conname, pg_get_constraintdef(constraint_.oid)
+                                   FROM pg_constraint AS constraint_
+                                   JOIN pg_class AS table_ ON table_.oid = constraint_.conrelid
+                                   JOIN pg_namespace AS namespace ON namespace.oid = table_.relnamespace
+                                   WHERE constraint_.contype = 'f'
+                                     AND namespace.nspname = 'content'
+                                     AND table_.relname = ANY(%s)'''
+
+CREATE_DEFERRED_SCHEMA_TABLE_QUERY = '''CREATE TABLE IF NOT EXISTS public.migration_deferred_schema (
+                                            kind TEXT NOT NULL,
+                                            table_name TEXT NOT NULL,
+                                            name TEXT NOT NULL,
+                                            definition TEXT NOT NULL,
+                                            PRIMARY KEY (kind, name)
+                                        )'''
+
+SELECT_DEFERRED_SCHEMA_QUERY = 'SELECT kind, table_name, name, definition FROM public.migration_deferred_schema'
+
+SAVE_DEFERRED_SCHEMA_QUERY = '''INSERT INTO public.migration_deferred_schema (kind, table_name, name, definition)
+                                VALUES (%s, %s, %s, %s) ON CONFLICT (kind, name) DO NOTHING'''
+
+FORGET_DEFERRED_SCHEMA_QUERY = 'DELETE FROM public.migration_deferred_schema WHERE kind = %s AND name = %s'
+
+DROP_INDEX_QUERY = 'DROP INDEX IF EXISTS content.{name}'
+
+DROP_CONSTRAINT_QUERY = 'ALTER TABLE content.{table} DROP CONSTRAINT IF EXISTS {name}'
+
+ADD_CONSTRAINT_QUERY = 'ALTER TABLE content.{table} ADD CONSTRAINT {name} {definition} NOT VALID'
+
+VALIDATE_CONSTRAINT_QUERY = 'ALTER TABLE content.{table} VALIDATE CONSTRAINT {name}'
+
+PREPARE_QUERY = 'PREPARE {name} ({types}) AS {query}'
+
+EXECUTE_PREPARED_QUERY = 'EXECUTE {name} ({placeholders})'
+
+PREPARED_STATEMENT_EXISTS_QUERY = 'SELECT 1 FROM pg_prepared_statements WHERE name = %s'
+
+SEARCH_PROJECTION_EXISTS_QUERY = "SELECT to_regprocedure('content.refresh_film_work_search(timestamp with time zone)')"
+
+SELECT_NOW_QUERY = 'SELECT NOW()'
+
+REFRESH_SEARCH_PROJECTION_QUERY = 'SELECT content.refresh_film_work_search(%s)'
+
+SELECT_IDS_QUERY = 'SELECT id FROM {table}'
+
+SAVEPOINT_QUERY = 'SAVEPOINT batch'
+
+RELEASE_SAVEPOINT_QUERY = 'RELEASE SAVEPOINT batch'
+
+ROLLBACK_TO_SAVEPOINT_QUERY = 'ROLLBACK TO SAVEPOINT batch'
+
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS film_work (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    creation_date DATE,
+    file_path TEXT,
+    rating FLOAT,
+    type TEXT NOT NULL,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE IF NOT EXISTS genre (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE IF NOT EXISTS person (
+    id TEXT PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE IF NOT EXISTS genre_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    genre_id TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+CREATE TABLE IF NOT EXISTS person_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    person_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+'''
+
+SNAPSHOT_TRANSACTION_QUERY = 'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY'
+
+SET_UTC_TIME_ZONE_QUERY = "SET TIME ZONE 'UTC'"
+
+EXPORT_QUERY = {
+    'film_work': '''SELECT id, title, description, creation_date::text, rating, type, created::text, modified::text
+                    FROM content.film_work''',
+    'person': 'SELECT id, full_name, created::text, modified::text FROM content.person',
+    'genre': 'SELECT id, name, description, created::text, modified::text FROM content.genre',
+    'genre_film_work': 'SELECT id, film_work_id, genre_id, created::text FROM content.genre_film_work',
+    'person_film_work': 'SELECT id, film_work_id, person_id, role, created::text FROM content.person_film_work',
 }
+
+SQLITE_INSERT_QUERY = {
+    'film_work': '''INSERT INTO film_work (id, title, description, creation_date, rating, type, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+    'person': 'INSERT INTO person (id, full_name, created_at, updated_at) VALUES (?, ?, ?, ?)',
+    'genre': 'INSERT INTO genre (id, name, description, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+    'genre_film_work': 'INSERT INTO genre_film_work (id, film_work_id, genre_id, created_at) VALUES (?, ?, ?, ?)',
+    'person_film_work': '''INSERT INTO person_film_work (id, film_work_id, person_id, role, created_at)
+                           VALUES (?, ?, ?, ?, ?)''',
+}
+
+SQLITE_TABLES_QUERY = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+
+SQLITE_COLUMNS_QUERY = 'SELECT name FROM pragma_table_info(?) ORDER BY cid'
+
+TARGET_COLUMNS_QUERY = '''SELECT table_.relname,
+                                 attribute.attname,
+                                 format_type(attribute.atttypid, attribute.atttypmod)
+                          FROM pg_attribute AS attribute
+                          JOIN pg_class AS table_ ON table_.oid = attribute.attrelid
+                          JOIN pg_namespace AS namespace ON namespace.oid = table_.relnamespace
+                          WHERE namespace.nspname = 'content'
+                            AND table_.relkind IN ('r', 'p')
+                            AND attribute.attnum > 0
+                            AND NOT attribute.attisdropped
+                            AND attribute.attgenerated = ''
+                          ORDER BY table_.relname, attribute.attnum'''
+
+PRIMARY_KEYS_QUERY = '''SELECT constraint_.table_name, usage.column_name
+                        FROM information_schema.table_constraints AS constraint_
+                        JOIN information_schema.key_column_usage AS usage
+                          ON usage.constraint_schema = constraint_.constraint_schema
+                         AND usage.constraint_name = constraint_.constraint_name
+                        WHERE constraint_.table_schema = 'content' AND constraint_.constraint_type = 'PRIMARY KEY'
+                        ORDER BY usage.ordinal_position'''
+
+NATURAL_KEYS_QUERY = '''SELECT table_.relname, index_.relname, attribute.attname
+                        FROM pg_index AS pg_index_
+                        JOIN pg_class AS index_ ON index_.oid = pg_index_.indexrelid
+                        JOIN pg_class AS table_ ON table_.oid = pg_index_.indrelid
+                        JOIN pg_namespace AS namespace ON namespace.oid = table_.relnamespace
+                        CROSS JOIN LATERAL unnest(pg_index_.indkey::smallint[])
+                                           WITH ORDINALITY AS key_(attnum, position)
+                        JOIN pg_attribute AS attribute
+                          ON attribute.attrelid = table_.oid AND attribute.attnum = key_.attnum
+                        WHERE namespace.nspname = 'content'
+                          AND pg_index_.indisunique
+                          AND NOT pg_index_.indisprimary
+                          AND pg_index_.indpred IS NULL
+                          AND pg_index_.indexprs IS NULL
+                        ORDER BY table_.relname, index_.relname, key_.position'''
+
+INSERT_QUERY = 'INSERT INTO {table} ({columns}) VALUES ({values}) ON CONFLICT ({key}) {action}'
+
+COPY_QUERY = 'COPY {staging} ({columns}) FROM STDIN'
+
+MERGE_QUERY = 'INSERT INTO {table} ({columns}) SELECT {values} FROM {staging} ON CONFLICT ({key}) {action}'
+
+DO_NOTHING_ACTION = 'DO NOTHING'
+
+DO_UPDATE_ACTION = 'DO UPDATE SET {updates}'
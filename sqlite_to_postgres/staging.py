@@ -0,0 +1,188 @@
+from argparse import ArgumentParser
+from dataclasses import fields
+from datetime import date
+from os import environ, makedirs, path
+from typing import Generator
+from uuid import UUID
+
+from batching import AdaptiveBatchController, MemoryBudget
+from context_managers import open_sqlite_db
+from dotenv import load_dotenv
+from loaders import BATCH_SIZE, Batch, split_rowid_range
+from metrics import metrics
+from movies_dataclasses import MOVIE_DATACLASS
+from project_logger import log
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    from pyarrow import ipc
+except ImportError:
+    pa = None
+
+STAGING_FORMATS = ('parquet', 'arrow')
+ROW_GROUP_SIZE = 100_000
+ROWID_COLUMN = 'source_rowid'
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError('Для промежуточных файлов Parquet/Arrow нужен пакет pyarrow')
+
+
+def _uuid_type():
+    return pa.uuid() if hasattr(pa, 'uuid') else pa.binary(16)
+
+
+def _uuid_text(value) -> str:
+    if isinstance(value, bytes):
+        value = UUID(bytes=value)
+    return str(value)
+
+
+def table_schema(table: str):
+    _require_pyarrow()
+    arrow_types = {UUID: _uuid_type(), str: pa.string(), float: pa.float64(), date: pa.string()}
+    columns = [pa.field(ROWID_COLUMN, pa.int64(), nullable=False)]
+    columns += [pa.field(column.name, arrow_types[column.type]) for column in fields(MOVIE_DATACLASS[table])]
+    return pa.schema(columns)
+
+
+def staging_file(directory: str, table: str, file_format: str) -> str:
+    return path.join(directory, f'{table}.{file_format}')
+
+
+class ArrowExporter:
+    def __init__(self, directory: str, file_format: str = 'parquet', compression: str = 'zstd'):
+        _require_pyarrow()
+        self.directory = directory
+        self.file_format = file_format
+        self.compression = None if compression == 'none' else compression
+
+    def export_all(self, sqlite_db: str) -> None:
+        makedirs(self.directory, exist_ok=True)
+        with open_sqlite_db(sqlite_db, read_only=True) as sqlite_conn:
+            for table in MOVIE_DATACLASS.keys():
+                self.export_table(sqlite_conn, table)
+
+    def export_table(self, sqlite_conn, table: str) -> None:
+        schema = table_schema(table)
+        columns = ', '.join(schema.names[1:])
+        cursor = sqlite_conn.execute(f'SELECT rowid, {columns} FROM {table} ORDER BY rowid;')
+        exported = 0
+        with self._writer(staging_file(self.directory, table, self.file_format), schema) as writer:
+            while rows := cursor.fetchmany(ROW_GROUP_SIZE):
+                arrays = [
+                    pa.array(self._convert(values, column.type), column.type)
+                    for values, column in zip(zip(*rows), schema)
+                ]
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                exported += len(rows)
+        log.info(f'Выгрузка: Таблица "{table}" записана в {self.file_format}, записей {exported}')
+
+    def _writer(self, file_name: str, schema):
+        if self.file_format == 'parquet':
+            return pq.ParquetWriter(file_name, schema, compression=self.compression or 'none')
+        return ipc.new_file(file_name, schema, options=ipc.IpcWriteOptions(compression=self.compression))
+
+    @staticmethod
+    def _convert(values: tuple, arrow_type) -> list:
+        if arrow_type == _uuid_type():
+            return [None if value is None else UUID(value).bytes for value in values]
+        return list(values)
+
+
+class ArrowExtractor:
+    def __init__(
+        self,
+        directory: str,
+        controller: AdaptiveBatchController = None,
+        memory_budget: MemoryBudget = None,
+    ):
+        _require_pyarrow()
+        self.directory = directory
+        self.controller = controller
+        self.memory_budget = memory_budget
+
+    def extract_table(
+        self,
+        table: str,
+        rowid_range: tuple[int, int] = None,
+        after_rowid: int = None,
+    ) -> Generator[Batch, None, None]:
+        yield from metrics.timed_batches(self._batches(table, rowid_range, after_rowid), table, 'extract')
+
+    def _batches(self, table: str, rowid_range: tuple[int, int], after_rowid: int) -> Generator[Batch, None, None]:
+        extracted = 0
+        for record_batch in self._record_batches(table):
+            record_batch = self._filter(record_batch, rowid_range, after_rowid)
+            offset = 0
+            while offset < record_batch.num_rows:
+                chunk = record_batch.slice(offset, self._fetch_size())
+                offset += chunk.num_rows
+                extracted += chunk.num_rows
+                batch = Batch(self._to_rows(chunk), pc.max(chunk.column(ROWID_COLUMN)).as_py())
+                if self.memory_budget:
+                    self.memory_budget.observe(batch.rows)
+                yield batch
+        log.info(f'Промежуточные файлы: Прочитано {extracted} записей таблицы "{table}"')
+
+    def shard_bounds(self, table: str, shards: int) -> list[tuple[int, int]]:
+        minimum, maximum = None, None
+        for record_batch in self._record_batches(table):
+            bounds = pc.min_max(record_batch.column(ROWID_COLUMN)).as_py()
+            if bounds['min'] is not None:
+                minimum = bounds['min'] if minimum is None else min(minimum, bounds['min'])
+                maximum = bounds['max'] if maximum is None else max(maximum, bounds['max'])
+        return split_rowid_range(minimum, maximum, shards)
+
+    def _record_batches(self, table: str):
+        arrow_file = staging_file(self.directory, table, 'arrow')
+        if path.exists(arrow_file):
+            reader = ipc.open_file(pa.memory_map(arrow_file))
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index)
+        else:
+            parquet_file = pq.ParquetFile(staging_file(self.directory, table, 'parquet'), memory_map=True)
+            yield from parquet_file.iter_batches(batch_size=ROW_GROUP_SIZE)
+
+    @staticmethod
+    def _filter(record_batch, rowid_range: tuple[int, int], after_rowid: int):
+        rowids = record_batch.column(ROWID_COLUMN)
+        mask = None
+        if rowid_range:
+            mask = pc.and_(pc.greater_equal(rowids, rowid_range[0]), pc.less_equal(rowids, rowid_range[1]))
+        if after_rowid is not None:
+            after = pc.greater(rowids, after_rowid)
+            mask = after if mask is None else pc.and_(mask, after)
+        return record_batch if mask is None else record_batch.filter(mask)
+
+    @staticmethod
+    def _to_rows(record_batch) -> list[tuple]:
+        columns = []
+        for name in record_batch.schema.names[1:]:
+            values = record_batch.column(name).to_pylist()
+            if record_batch.schema.field(name).type == _uuid_type():
+                values = [None if value is None else _uuid_text(value) for value in values]
+            columns.append(values)
+        return list(zip(*columns))
+
+    def _fetch_size(self) -> int:
+        fetch_size = self.controller.batch_size if self.controller else BATCH_SIZE
+        return self.memory_budget.cap(fetch_size) if self.memory_budget else fetch_size
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    parser = ArgumentParser(description='Выгрузка SQLite в промежуточные файлы Parquet/Arrow')
+    parser.add_argument('directory')
+    parser.add_argument('--format', choices=STAGING_FORMATS, default='parquet')
+    parser.add_argument(
+        '--compression',
+        default='zstd',
+        help='zstd, lz4 или none; файлы arrow без сжатия отображаются через mmap без распаковки, '
+             'но строки для записи всё равно собираются в объекты Python',
+    )
+    args = parser.parse_args()
+    ArrowExporter(args.directory, args.format, args.compression).export_all(environ.get('SQLT_DB_NAME'))
@@ -0,0 +1,175 @@
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from hashlib import md5
+from os import environ
+from typing import Iterator
+
+from context_managers import open_postgresql_db, open_sqlite_db
+from dotenv import load_dotenv
+from project_logger import log
+from psycopg2.extensions import cursor as postgres_cursor
+from schema_mapping import MOVIE_MAPPING, TableMapping, active_mapping, sqlite_identifier
+
+CHUNK_SIZE = 10_000
+NULL_MARKER = '\\N'
+ROW_SEPARATOR = '\n'
+FLOAT_SCALE = 1_000_000
+
+
+@dataclass
+class TableReport:
+    table: str
+    rows: int = 0
+    chunks: int = 0
+    mismatched_chunks: int = 0
+    missing: list[str] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)
+    different: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatched_chunks
+
+
+def column_text_expressions(column: str, parameter_type: str) -> tuple[str, str]:
+    name = sqlite_identifier(column)
+    if parameter_type in ('float8', 'double precision', 'real'):
+        sqlite_text = f'CAST(CAST({name} * {FLOAT_SCALE} AS INTEGER) AS TEXT)'
+        postgres_text = f'trunc({name} * {FLOAT_SCALE})::bigint::text'
+    elif parameter_type == 'date':
+        sqlite_text = f'coalesce(date({name}), {name})'
+        postgres_text = f"to_char({name}, 'YYYY-MM-DD')"
+    else:
+        sqlite_text = name
+        postgres_text = f'{name}::text'
+    return (
+        f"CASE WHEN {name} IS NULL THEN '{NULL_MARKER}' ELSE {sqlite_text} END",
+        f"CASE WHEN {name} IS NULL THEN '{NULL_MARKER}' ELSE {postgres_text} END",
+    )
+
+
+def row_text_expressions(table: str, mapping: dict[str, TableMapping] = None) -> tuple[str, str]:
+    table_mapping = (mapping or MOVIE_MAPPING)[table]
+    sqlite_columns, postgres_columns = zip(
+        *map(column_text_expressions, table_mapping.columns, table_mapping.parameter_types)
+    )
+    return " || '|' || ".join(sqlite_columns), " || '|' || ".join(postgres_columns)
+
+
+class ConsistencyVerifier:
+    def __init__(
+        self,
+        sqlite_db: str,
+        dsl: dict,
+        chunk_size: int = CHUNK_SIZE,
+        workers: int = 4,
+        mapping: dict[str, TableMapping] = None,
+    ):
+        self.sqlite_db = sqlite_db
+        self.dsl = dsl
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.mapping = mapping or MOVIE_MAPPING
+
+    def verify_all(self) -> dict[str, TableReport]:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            reports = executor.map(self.verify_table, self.mapping.keys())
+            return {report.table: report for report in reports}
+
+    def verify_table(self, table: str) -> TableReport:
+        report = TableReport(table)
+        sqlite_row, postgres_row = row_text_expressions(table, self.mapping)
+        with open_sqlite_db(self.sqlite_db, read_only=True) as sqlite_conn, open_postgresql_db(self.dsl) as pg_conn:
+            sqlite_cursor = sqlite_conn.cursor()
+            pg_cursor = pg_conn.cursor()
+            sqlite_cursor.execute(f'SELECT id, {sqlite_row} FROM {table} ORDER BY id;')
+            for lower, upper, rows, sqlite_hash in self._sqlite_chunks(sqlite_cursor):
+                report.rows += rows
+                report.chunks += 1
+                if self._postgres_hash(pg_cursor, table, postgres_row, lower, upper) != sqlite_hash:
+                    report.mismatched_chunks += 1
+                    self._drill_down(sqlite_conn, pg_cursor, report, sqlite_row, postgres_row, lower, upper)
+        log.info(
+            f'Сверка: Таблица "{table}": {report.rows} записей в {report.chunks} частях, '
+            f'расхождений в частях {report.mismatched_chunks}, нет в PostgreSQL {len(report.missing)}, '
+            f'лишних {len(report.extra)}, отличается {len(report.different)}'
+        )
+        return report
+
+    def _sqlite_chunks(self, cursor) -> Iterator[tuple]:
+        lower, rows, digest = None, 0, md5()
+        for row_id, row_text in cursor:
+            digest.update(f'{row_text}{ROW_SEPARATOR}'.encode())
+            rows += 1
+            if rows == self.chunk_size:
+                yield lower, row_id, rows, digest.hexdigest()
+                lower, rows, digest = row_id, 0, md5()
+        yield lower, None, rows, digest.hexdigest() if rows else None
+
+    @staticmethod
+    def _postgres_hash(cursor: postgres_cursor, table: str, row_text: str, lower: str, upper: str) -> str:
+        where, params = _range_condition(lower, upper, '%s::uuid')
+        cursor.execute(
+            f"SELECT md5(string_agg({row_text} || E'\\n', '' ORDER BY id)) FROM content.{table}{where}",
+            params,
+        )
+        return cursor.fetchone()[0]
+
+    def _drill_down(
+        self,
+        sqlite_conn,
+        pg_cursor: postgres_cursor,
+        report: TableReport,
+        sqlite_row: str,
+        postgres_row: str,
+        lower: str,
+        upper: str,
+    ) -> None:
+        where, params = _range_condition(lower, upper, '?')
+        source = dict(sqlite_conn.execute(f'SELECT id, {sqlite_row} FROM {report.table}{where};', params))
+        where, params = _range_condition(lower, upper, '%s::uuid')
+        pg_cursor.execute(f'SELECT id::text, {postgres_row} FROM content.{report.table}{where}', params)
+        target = dict(pg_cursor.fetchall())
+        report.missing.extend(row_id for row_id in source if row_id not in target)
+        report.extra.extend(row_id for row_id in target if row_id not in source)
+        report.different.extend(
+            row_id for row_id, row_text in source.items() if row_id in target and target[row_id] != row_text
+        )
+
+
+def _range_condition(lower: str, upper: str, placeholder: str) -> tuple[str, list]:
+    conditions, params = [], []
+    if lower is not None:
+        conditions.append(f'id > {placeholder}')
+        params.append(lower)
+    if upper is not None:
+        conditions.append(f'id <= {placeholder}')
+        params.append(upper)
+    return (f' WHERE {" AND ".join(conditions)}' if conditions else ''), params
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    parser = ArgumentParser(description='Сверка данных SQLite и PostgreSQL по хешам частей таблиц')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=len(MOVIE_MAPPING))
+    parser.add_argument('--introspect', action='store_true')
+    args = parser.parse_args()
+    dsl = {
+        'dbname': environ.get('DB_NAME'),
+        'user': environ.get('DB_USER'),
+        'password': environ.get('DB_PASSWORD'),
+        'host': environ.get('DB_HOST', '127.0.0.1'),
+        'port': environ.get('DB_PORT', 5432),
+        'options': '-c search_path=content',
+    }
+    sqlite_db = environ.get('SQLT_DB_NAME')
+    mapping = active_mapping(sqlite_db, dsl, args.introspect)
+    verifier = ConsistencyVerifier(sqlite_db, dsl, args.chunk_size, args.workers, mapping)
+    reports = verifier.verify_all()
+    for report in reports.values():
+        for kind in ('missing', 'extra', 'different'):
+            for row_id in getattr(report, kind):
+                print(f'{report.table}\t{kind}\t{row_id}')
+    raise SystemExit(0 if all(report.ok for report in reports.values()) else 1)
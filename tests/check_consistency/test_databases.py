@@ -4,6 +4,8 @@ from os import environ
 import psycopg2
 import pytest
 from dotenv import load_dotenv
+from movies_dataclasses import MOVIE_DATACLASS
+from verifier import ConsistencyVerifier
 
 load_dotenv()
 
@@ -81,51 +83,8 @@ def test_number_of_records_in_genre_film_work_tables(setup_databases):
     assert pg_number_of_records[0] == sqlt_number_of_records[0]
 
 
-def test_match_records_in_genre_tables(setup_databases):
-    pg_cur, sqlt_cur = setup_databases
-    query = '''SELECT id, name, description FROM genre'''
-    pg_cur.execute(query)
-    sqlt_cur.execute(query)
-    pg_number_of_records = pg_cur.fetchall()
-    sqlt_number_of_records = sqlt_cur.fetchall()
-    assert set(sqlt_number_of_records) == set(pg_number_of_records)
-
-
-def test_match_records_in_person_tables(setup_databases):
-    pg_cur, sqlt_cur = setup_databases
-    query = '''SELECT id, full_name FROM person'''
-    pg_cur.execute(query)
-    sqlt_cur.execute(query)
-    pg_number_of_records = pg_cur.fetchall()
-    sqlt_number_of_records = sqlt_cur.fetchall()
-    assert set(sqlt_number_of_records) == set(pg_number_of_records)
-
-
-def test_match_records_in_film_work_tables(setup_databases):
-    pg_cur, sqlt_cur = setup_databases
-    query = '''SELECT id, title, description, creation_date, rating, type FROM film_work'''
-    pg_cur.execute(query)
-    sqlt_cur.execute(query)
-    pg_number_of_records = pg_cur.fetchall()
-    sqlt_number_of_records = sqlt_cur.fetchall()
-    assert set(sqlt_number_of_records) == set(pg_number_of_records)
-
-
-def test_match_records_in_person_film_work_tables(setup_databases):
-    pg_cur, sqlt_cur = setup_databases
-    query = '''SELECT id, person_id, film_work_id, role FROM person_film_work'''
-    pg_cur.execute(query)
-    sqlt_cur.execute(query)
-    pg_number_of_records = pg_cur.fetchall()
-    sqlt_number_of_records = sqlt_cur.fetchall()
-    assert set(sqlt_number_of_records) == set(pg_number_of_records)
-
-
-def test_match_records_in_genre_film_work_tables(setup_databases):
-    pg_cur, sqlt_cur = setup_databases
-    query = '''SELECT id, genre_id, film_work_id FROM genre_film_work'''
-    pg_cur.execute(query)
-    sqlt_cur.execute(query)
-    pg_number_of_records = pg_cur.fetchall()
-    sqlt_number_of_records = sqlt_cur.fetchall()
-    assert set(sqlt_number_of_records) == set(pg_number_of_records)
+@pytest.mark.parametrize('table', MOVIE_DATACLASS.keys())
+def test_match_records_in_tables(table):
+    verifier = ConsistencyVerifier(environ.get('SQLT_DB_NAME'), dsl)
+    report = verifier.verify_table(table)
+    assert report.ok, report
@@ -0,0 +1,39 @@
+import sqlite3
+from os import environ
+
+import pytest
+from dotenv import load_dotenv
+from dump_data import export_snapshot
+from movies_dataclasses import MOVIE_DATACLASS
+from verifier import ConsistencyVerifier
+
+load_dotenv()
+
+dsl = {
+    'dbname': environ.get('DB_NAME'),
+    'user': environ.get('DB_USER'),
+    'password': environ.get('DB_PASSWORD'),
+    'host': environ.get('DB_HOST', '127.0.0.1'),
+    'port': environ.get('DB_PORT', 5432),
+    'options': '-c search_path=content',
+}
+
+
+@pytest.fixture(scope='module')
+def snapshot(tmp_path_factory):
+    output = str(tmp_path_factory.mktemp('export') / 'snapshot.sqlite')
+    export_snapshot(dsl, output)
+    return output
+
+
+@pytest.mark.parametrize('table', MOVIE_DATACLASS.keys())
+def test_exported_snapshot_matches_postgres(snapshot, table):
+    report = ConsistencyVerifier(snapshot, dsl).verify_table(table)
+    assert report.ok, report
+
+
+@pytest.mark.parametrize('table', MOVIE_DATACLASS.keys())
+def test_exported_snapshot_matches_source(snapshot, table):
+    with sqlite3.connect(snapshot) as exported, sqlite3.connect(environ.get('SQLT_DB_NAME')) as source:
+        query = f'SELECT COUNT(*) FROM {table}'
+        assert exported.execute(query).fetchone() == source.execute(query).fetchone()
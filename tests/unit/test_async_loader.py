@@ -0,0 +1,27 @@
+from datetime import date
+
+from async_loader import asyncpg_rows, source_date
+from schema_mapping import MOVIE_MAPPING
+
+FILM_ID = 'aa25b0b4-20fa-4ab2-be21-82267830f754'
+
+
+def test_film_rows_bind_creation_date_as_date():
+    rows = [
+        ('Film', '', 'movie', FILM_ID, 7.5, '2021-06-16'),
+        ('Film', '', 'movie', FILM_ID, None, '2021-06-16 00:00:00'),
+        ('Film', '', 'movie', FILM_ID, None, None),
+    ]
+    converted = asyncpg_rows(MOVIE_MAPPING['film_work'], rows)
+    assert [row[5] for row in converted] == [date(2021, 6, 16), date(2021, 6, 16), None]
+    assert converted[0][:5] == rows[0][:5]
+
+
+def test_rows_without_date_columns_are_passed_through():
+    rows = [('Drama', '', FILM_ID)]
+    assert asyncpg_rows(MOVIE_MAPPING['genre'], rows) is rows
+
+
+def test_unparseable_date_is_left_for_the_driver_to_reject():
+    assert source_date('2020-02-30') == '2020-02-30'
+    assert source_date('2020-1-5') == date(2020, 1, 5)
@@ -0,0 +1,21 @@
+from datetime import date
+from uuid import UUID
+
+from delta import fingerprint
+from schema_mapping import MOVIE_MAPPING
+
+FILM_ID = 'aa25b0b4-20fa-4ab2-be21-82267830f754'
+TYPES = MOVIE_MAPPING['film_work'].parameter_types
+
+
+def test_source_text_and_postgres_values_share_a_fingerprint():
+    source = ('Film', None, 'movie', FILM_ID.upper(), 7, '2021-06-16 00:00:00')
+    postgres = ('Film', None, 'movie', FILM_ID, 7.0, date(2021, 6, 16))
+    assert fingerprint(source, TYPES) == fingerprint(postgres, TYPES)
+    assert fingerprint(('Film', None, 'movie', UUID(FILM_ID), 7.0, '2021-06-16'), TYPES) == fingerprint(postgres, TYPES)
+
+
+def test_changed_values_change_the_fingerprint():
+    postgres = ('Film', None, 'movie', FILM_ID, 7.0, date(2021, 6, 16))
+    assert fingerprint(('Film', None, 'movie', FILM_ID, 7.0, '2021-06-17'), TYPES) != fingerprint(postgres, TYPES)
+    assert fingerprint(('Film', '', 'movie', FILM_ID, 7.0, '2021-06-16'), TYPES) != fingerprint(postgres, TYPES)
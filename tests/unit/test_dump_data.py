@@ -0,0 +1,12 @@
+import psycopg2
+import pytest
+from dump_data import export_snapshot
+
+
+def test_failed_export_keeps_previous_snapshot(tmp_path):
+    output = tmp_path / 'snapshot.sqlite'
+    output.write_bytes(b'previous snapshot')
+    with pytest.raises(psycopg2.OperationalError):
+        export_snapshot({'host': '127.0.0.1', 'port': 1, 'dbname': 'missing', 'connect_timeout': 1}, str(output))
+    assert output.read_bytes() == b'previous snapshot'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['snapshot.sqlite']
@@ -0,0 +1,30 @@
+import random
+import sqlite3
+from contextlib import closing
+
+from fixtures import PERSONS_PER_FILM, _person_links, generate_sqlite_fixture
+
+
+def test_person_links_do_not_repeat_a_person_within_a_film():
+    rnd = random.Random(7)
+    persons = [f'person-{number}' for number in range(5)]
+    films = [f'film-{number}' for number in range(200)]
+    links, new_persons = _person_links(rnd, films, persons)
+    pairs = [(film_id, person_id) for _, film_id, person_id, _ in links]
+    assert len(pairs) == len(set(pairs))
+    assert set(new_persons) <= set(persons)
+    for film_id in films:
+        cast = [person_id for linked_film, person_id in pairs if linked_film == film_id]
+        assert PERSONS_PER_FILM[0] <= len(cast) <= PERSONS_PER_FILM[1]
+
+
+def test_same_seed_generates_the_same_fixture(tmp_path):
+    dumps = []
+    for name in ('first.sqlite', 'second.sqlite'):
+        generate_sqlite_fixture(str(tmp_path / name), 300, seed=3)
+        with closing(sqlite3.connect(tmp_path / name)) as connection:
+            dumps.append(list(connection.iterdump()))
+    assert dumps[0] == dumps[1]
+    generate_sqlite_fixture(str(tmp_path / 'other.sqlite'), 300, seed=4)
+    with closing(sqlite3.connect(tmp_path / 'other.sqlite')) as connection:
+        assert list(connection.iterdump()) != dumps[0]
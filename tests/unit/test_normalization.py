@@ -0,0 +1,86 @@
+from loaders import Batch
+from movies.models import FilmType, PersonRole
+from movies_dataclasses import FILM_TYPES, PERSON_ROLES
+from normalization import BatchNormalizer, check_dates, check_enum, check_ratings, check_uuids, column_check
+
+UUID = 'aa25b0b4-20fa-4ab2-be21-82267830f754'
+
+
+class MemoryQuarantine:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, table, row, reason):
+        self.rows.append((table, row, reason))
+
+
+def test_check_uuids_lowercases_and_rejects_malformed():
+    normalized, changed, invalid = check_uuids([UUID.upper(), UUID, 'nope', None])
+    assert normalized == [UUID, UUID, 'nope', None]
+    assert changed == 1
+    assert invalid.to_pylist() == [False, False, True, True]
+
+
+def test_check_uuids_keeps_clean_column():
+    normalized, changed, invalid = check_uuids([UUID, UUID])
+    assert normalized is None and changed == 0
+    assert invalid.to_pylist() == [False, False]
+
+
+def test_check_enum_applies_aliases():
+    normalized, changed, invalid = check_enum(
+        frozenset({'actor', 'screenwriter'}), {'writer': 'screenwriter'}, [' Actor', 'writer', 'cartoon', None],
+    )
+    assert normalized == ['actor', 'screenwriter', 'cartoon', None]
+    assert changed == 2
+    assert invalid.to_pylist() == [False, False, True, True]
+
+
+def test_check_ratings_range_and_text():
+    normalized, changed, invalid = check_ratings([7.5, None, 11.0, -1])
+    assert normalized is None
+    assert invalid.to_pylist() == [False, False, True, True]
+    normalized, changed, invalid = check_ratings(['7.5', 'bad', 3])
+    assert normalized[0] == 7.5 and normalized[2] == 3.0
+    assert changed == 2
+    assert invalid.to_pylist() == [False, True, False]
+
+
+def test_check_dates_normalizes_and_rejects_impossible_dates():
+    values = ['2020-1-5', '2021-06-16 00:00:00', '2020-02-30', 'yesterday', None, '2020-01-05']
+    normalized, changed, invalid = check_dates(values)
+    assert normalized[:2] == ['2020-01-05', '2021-06-16']
+    assert normalized[-1] == '2020-01-05'
+    assert changed == 2
+    assert invalid.to_pylist() == [False, False, True, True, False, False]
+
+
+def test_column_check_dispatch():
+    assert column_check('film_work_id') is check_uuids
+    assert column_check('rating') is check_ratings
+    assert column_check('creation_date') is check_dates
+    assert column_check('title') is None
+
+
+def test_normalizer_quarantines_rejected_rows():
+    quarantine = MemoryQuarantine()
+    normalizer = BatchNormalizer(quarantine)
+    rows = [
+        ('Film', None, 'Movie', UUID.upper(), 5.0, '2020-1-5'),
+        ('Film', None, 'cartoon', UUID, 11.0, None),
+    ]
+    batch = normalizer.transform('film_work')(Batch(rows, 2))
+    assert batch.rows == [('Film', None, 'movie', UUID, 5.0, '2020-01-05')]
+    assert batch.last_rowid == 2
+    assert quarantine.rows == [('film_work', rows[1], 'недопустимые значения: type, rating')]
+    assert normalizer.rejected[('film_work', 'type')] == 1
+
+
+def test_enum_values_match_django_choices():
+    assert PERSON_ROLES == set(PersonRole.values)
+    assert FILM_TYPES == set(FilmType.values)
+
+
+def test_check_enum_accepts_every_person_role():
+    _, _, invalid = check_enum(PERSON_ROLES, {}, sorted(PersonRole.values))
+    assert not any(invalid.to_pylist())
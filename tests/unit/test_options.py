@@ -0,0 +1,12 @@
+from options import LoadOptions
+
+
+def test_memory_budget_is_shared_by_all_workers():
+    single = LoadOptions(memory_limit=120_000).memory_budget('film_work')
+    parallel = LoadOptions(memory_limit=120_000, workers=4, shards=8, queue_depth=1).memory_budget('film_work')
+    assert single.limit_bytes == 60_000
+    assert parallel.limit_bytes == 120_000 // (3 * 4)
+
+
+def test_memory_budget_is_optional():
+    assert LoadOptions().memory_budget('film_work') is None
@@ -0,0 +1,28 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from movies.pagination import keyset_page_number, seek_condition
+
+
+def test_seek_condition_single_field():
+    where = str(ContentType.objects.filter(seek_condition(('id',), [5])).query).split('WHERE')[1]
+    assert '"id" > 5' in where
+
+
+def test_seek_condition_leads_with_an_index_range_on_the_first_field():
+    query = str(ContentType.objects.filter(seek_condition(('model', 'id'), ['film', 7])).query)
+    where = query.split('WHERE')[1]
+    assert where.strip().startswith('("django_content_type"."model" >= film AND')
+    assert '"django_content_type"."model" > film' in where
+    assert '("django_content_type"."id" > 7 AND "django_content_type"."model" = film)' in where
+
+
+@pytest.mark.parametrize('number, expected', [(1, 1), ('3', 3), (10 ** 9, 10 ** 9)])
+def test_keyset_page_number_ignores_the_count(number, expected):
+    assert keyset_page_number(number) == expected
+
+
+@pytest.mark.parametrize('number, error', [('x', PageNotAnInteger), (None, PageNotAnInteger), (0, EmptyPage)])
+def test_keyset_page_number_rejects_invalid_numbers(number, error):
+    with pytest.raises(error):
+        keyset_page_number(number)
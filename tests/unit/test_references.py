@@ -0,0 +1,47 @@
+from uuid import UUID, uuid4
+
+from loaders import Batch
+from references import IdIndex, ReferenceGuard, SortedIds, merge_runs
+
+
+class MemoryQuarantine:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, table, row, reason):
+        self.rows.append((table, row, reason))
+
+
+def test_merge_runs_sorts_and_dedupes():
+    first, second = sorted(uuid4().bytes for _ in range(5)), sorted(uuid4().bytes for _ in range(3))
+    merged = merge_runs(SortedIds(b''.join(first)), sorted(second + first[:2]))
+    assert list(merged) == sorted(set(first + second))
+
+
+def test_id_index_keeps_logarithmic_runs():
+    index = IdIndex()
+    ids = [str(uuid4()) for _ in range(64)]
+    for position, value in enumerate(ids):
+        index.add([value])
+        assert value in index
+        assert ids[position // 2] in index
+    assert len(index.runs) <= 7
+    assert len(index) == 64
+    assert str(uuid4()) not in index
+    assert 'not-a-uuid' not in index
+    assert UUID(ids[10]) in index
+
+
+def test_reference_guard_indexes_parents_only_after_write():
+    quarantine = MemoryQuarantine()
+    guard = ReferenceGuard(quarantine)
+    genre_id, film_id = str(uuid4()), str(uuid4())
+    genres = Batch([('Drama', '', genre_id)], 1)
+    assert list(guard.check(iter([genres]), 'genre')) == [genres]
+    assert genre_id not in guard.indexes['genre']
+    guard.on_written('genre', genres.rows)
+    guard.on_written('film_work', [('Film', '', 'movie', film_id, 5.0, None)])
+    links = Batch([(genre_id, film_id, str(uuid4())), (str(uuid4()), film_id, str(uuid4()))], 2)
+    checked = list(guard.check(iter([links]), 'genre_film_work'))
+    assert checked[0].rows == links.rows[:1]
+    assert len(quarantine.rows) == 1 and quarantine.rows[0][2].startswith('нет записи genre')
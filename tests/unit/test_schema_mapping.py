@@ -0,0 +1,74 @@
+from psycopg2 import sql
+from schema_mapping import MOVIE_MAPPING, TableMapping
+
+
+def render(query) -> str:
+    if isinstance(query, sql.Composed):
+        return ''.join(render(part) for part in query.seq)
+    if isinstance(query, sql.Identifier):
+        return '.'.join(f'"{name}"' for name in query.strings)
+    if isinstance(query, sql.Placeholder):
+        return '%s'
+    return query.string
+
+
+def test_movie_mapping_follows_dataclasses():
+    film_work = MOVIE_MAPPING['film_work']
+    assert film_work.columns[:5] == ('title', 'description', 'type', 'id', 'rating')
+    assert film_work.parameter_types[:5] == ('text', 'text', 'text', 'uuid', 'float8')
+    assert MOVIE_MAPPING['person_film_work'].timestamps == ('created',)
+    assert list(MOVIE_MAPPING) == ['person', 'film_work', 'genre', 'genre_film_work', 'person_film_work']
+
+
+def test_insert_query():
+    assert render(MOVIE_MAPPING['person'].insert_query()) == (
+        'INSERT INTO "content"."person" ("full_name", "id", "created", "modified") '
+        'VALUES (%s, %s, NOW(), NOW()) ON CONFLICT ("id") DO NOTHING'
+    )
+
+
+def test_numbered_insert_query_for_prepared_statements():
+    assert render(MOVIE_MAPPING['genre'].insert_query(numbered=True)) == (
+        'INSERT INTO "content"."genre" ("name", "description", "id", "created", "modified") '
+        'VALUES ($1, $2, $3, NOW(), NOW()) ON CONFLICT ("id") DO NOTHING'
+    )
+
+
+def test_upsert_updates_non_key_columns_and_modified():
+    assert render(MOVIE_MAPPING['person'].insert_query(upsert=True)).endswith(
+        'ON CONFLICT ("id") DO UPDATE SET "full_name" = EXCLUDED."full_name", "modified" = NOW()'
+    )
+
+
+def test_upsert_without_updatable_columns_does_nothing():
+    mapping = TableMapping('tag', ('id',), ('uuid',))
+    assert render(mapping.insert_query(upsert=True)).endswith('ON CONFLICT ("id") DO NOTHING')
+
+
+def test_copy_and_merge_queries():
+    mapping = MOVIE_MAPPING['genre_film_work']
+    assert render(mapping.create_staging_query()) == (
+        'CREATE TEMP TABLE "staging_genre_film_work" (LIKE "content"."genre_film_work" INCLUDING DEFAULTS)\n'
+        '                                ON COMMIT DROP'
+    )
+    assert render(mapping.copy_query()) == (
+        'COPY "staging_genre_film_work" ("genre_id", "film_work_id", "id") FROM STDIN'
+    )
+    assert render(mapping.merge_query()) == (
+        'INSERT INTO "content"."genre_film_work" ("genre_id", "film_work_id", "id", "created") '
+        'SELECT "genre_id", "film_work_id", "id", NOW() FROM "staging_genre_film_work" '
+        'ON CONFLICT ("id") DO NOTHING'
+    )
+
+
+def test_sqlite_columns_are_quoted():
+    mapping = TableMapping('film_work', ('id', 'odd"name'), ('uuid', 'text'))
+    assert mapping.select_columns == '"id", "odd""name"'
+
+
+def test_link_upsert_conflicts_on_natural_key():
+    mapping = MOVIE_MAPPING['person_film_work']
+    assert render(mapping.insert_query()).endswith('ON CONFLICT ("id") DO NOTHING')
+    assert render(mapping.insert_query(upsert=True)).endswith(
+        'ON CONFLICT ("person_id", "film_work_id", "role") DO UPDATE SET "id" = EXCLUDED."id"'
+    )
@@ -0,0 +1,36 @@
+import sqlite3
+
+from verifier import NULL_MARKER, row_text_expressions
+
+
+def sqlite_row_text(table, create, row):
+    sqlite_row, _ = row_text_expressions(table)
+    connection = sqlite3.connect(':memory:')
+    connection.execute(create)
+    connection.execute(f'INSERT INTO {table} VALUES ({", ".join("?" * len(row))})', row)
+    return connection.execute(f'SELECT {sqlite_row} FROM {table}').fetchone()[0]
+
+
+def test_row_text_covers_every_mapped_column():
+    sqlite_row, postgres_row = row_text_expressions('film_work')
+    for column in ('title', 'description', 'type', 'id', 'rating', 'creation_date'):
+        assert f'"{column}"' in sqlite_row
+        assert f'"{column}"' in postgres_row
+
+
+def test_row_text_marks_null_rating_and_date():
+    create = 'CREATE TABLE film_work (title, description, type, id, rating, creation_date)'
+    text = sqlite_row_text('film_work', create, ('Film', None, 'movie', 'a', None, None))
+    assert text == f'Film|{NULL_MARKER}|movie|a|{NULL_MARKER}|{NULL_MARKER}'
+
+
+def test_row_text_truncates_scaled_rating_and_trims_date():
+    create = 'CREATE TABLE film_work (title, description, type, id, rating, creation_date)'
+    text = sqlite_row_text('film_work', create, ('Film', '', 'movie', 'a', 7.6, '2021-06-16 00:00:00'))
+    assert text == 'Film||movie|a|7600000|2021-06-16'
+
+
+def test_postgres_row_text_uses_the_same_float_scaling():
+    _, postgres_row = row_text_expressions('film_work')
+    assert 'trunc("rating" * 1000000)::bigint::text' in postgres_row
+    assert f"CASE WHEN \"rating\" IS NULL THEN '{NULL_MARKER}'" in postgres_row